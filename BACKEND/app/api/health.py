@@ -1,5 +1,7 @@
 from fastapi import FastAPI,APIRouter
 from datetime import datetime
+from app.core.metrics import snapshot
+from app.core.llm_clients import llm_clients
 
 
 router = APIRouter()
@@ -9,4 +11,12 @@ def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow()
-    }
\ No newline at end of file
+    }
+
+@router.get("/metrics")
+def metrics():
+    return snapshot()
+
+@router.get("/metrics/llm-clients")
+def llm_client_stats():
+    return llm_clients.stats()
@@ -1,23 +1,137 @@
-from fastapi import APIRouter, HTTPException, Body
-from app.services.lead_intelligence import generate_service_alignment
-from app.services.pitch_generator import generate_pitch_content, regenerate_pitch_content
+from fastapi import APIRouter, HTTPException, Body, Request, Query, Response
+from fastapi.responses import StreamingResponse
+from app.services.lead_intelligence import generate_service_alignment, iter_service_alignment
+from app.services.service_profile_cache import service_profiles
+from app.services.service_vector_index import service_index
+from app.services.pitch_generator import generate_pitch_content, astream_pitch_content, regenerate_pitch_content
+from app.services.pitch_drafts import build_pitch_context, schedule_pitch_draft, take_pitch_draft
 from app.services.lead_linkedin_entry import validate_lead_linkedin_profile
-from app.models.pitch_schema import PitchCreate, PitchDB, PitchRegenerate, PitchConfig
+from app.models.pitch_schema import PitchCreate, PitchDB, PitchRegenerate, PitchConfig, pitch_excerpt
+from app.models.alignment_schema import BatchAlignmentRequest
+from app.core.config import BATCH_ALIGNMENT_CONCURRENCY
 from app.core.database import get_db
+from app.core.executor import run_blocking
+from app.core.rate_governor import llm_lane
+from app.core.pagination import MAX_PAGE_SIZE, keyset_match, keyset_sort, page
 from bson import ObjectId
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Literal, Optional
 import asyncio
+import json
 from fastapi import Path
 
 
 router = APIRouter()
 
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 # ------------------- PERFORMING SERVICE ALIGNMENT HERE ---------------------------------
 @router.get("/intelligence/service-alignment/{lead_id}")
 async def get_service_alignment(lead_id: str):
     try:
-        return await generate_service_alignment(lead_id)
+        matched_services = await generate_service_alignment(lead_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    # Speculatively write the default pitch while the user reviews the results
+    schedule_pitch_draft(lead_id, matched_services)
+    return matched_services
+
+@router.get("/intelligence/service-alignment/{lead_id}/stream")
+async def stream_service_alignment(lead_id: str, request: Request):
+    """
+    Server-sent events version of the alignment endpoint. Emits
+    `summary`, `ranking`, one `service` per inference as it completes and a
+    final `done` event (or `error`).
+    """
+    if not ObjectId.is_valid(lead_id):
+        raise HTTPException(status_code=400, detail="Invalid lead id")
+
+    async def stream():
+        events = iter_service_alignment(lead_id)
+        try:
+            async for event, data in events:
+                if await request.is_disconnected():
+                    break
+                if event == "done":
+                    schedule_pitch_draft(lead_id, data["matched_services"])
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/intelligence/service-alignment/batch")
+async def batch_service_alignment(payload: BatchAlignmentRequest, request: Request):
+    """
+    Runs service alignment for many leads and streams one NDJSON line per
+    lead as it finishes. Leads are loaded with a single query, and at most
+    BATCH_ALIGNMENT_CONCURRENCY alignments run at once for this batch (LLM
+    calls are further capped globally by llm_slot).
+    """
+    db = get_db()
+    lead_ids = list(dict.fromkeys(payload.lead_ids))
+    valid_ids = [lid for lid in lead_ids if ObjectId.is_valid(lid)]
+
+    leads = await db.leads.find({"_id": {"$in": [ObjectId(lid) for lid in valid_ids]}}).to_list(length=None)
+    leads_by_id = {str(lead["_id"]): lead for lead in leads}
+
+    semaphore = asyncio.Semaphore(BATCH_ALIGNMENT_CONCURRENCY)
+
+    async def align_one(lead_id: str):
+        async with semaphore:
+            try:
+                # bulk work yields to interactive requests at the rate governor
+                with llm_lane("background"):
+                    result = await generate_service_alignment(lead_id, lead=leads_by_id[lead_id])
+                return {"lead_id": lead_id, "status": "ok", "matched_services": result}
+            except Exception as e:
+                return {"lead_id": lead_id, "status": "error", "error": str(e)}
+
+    async def stream():
+        for lead_id in lead_ids:
+            if lead_id not in leads_by_id:
+                reason = "Invalid lead id" if lead_id not in valid_ids else "Lead not found"
+                yield json.dumps({"lead_id": lead_id, "status": "error", "error": reason}) + "\n"
+
+        tasks = [asyncio.create_task(align_one(lid)) for lid in lead_ids if lid in leads_by_id]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                if await request.is_disconnected():
+                    break
+                yield json.dumps(await finished, default=str) + "\n"
+        finally:
+            # client went away (or the stream was closed) -> stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# ------------------- SERVICE KB CACHE CONTROL ---------------------------------
+@router.get("/intelligence/kb/status")
+async def get_kb_status():
+    return {
+        "profiles": service_profiles.status(),
+        "vector_index_services": len(service_index.services)
+    }
+
+@router.post("/intelligence/kb/reload")
+async def reload_kb():
+    """
+    Call after re-ingesting the service KB so the in-memory views are
+    rebuilt immediately instead of on the next stale check.
+    """
+    try:
+        # build() swaps the new table in whole, so lookups never see it empty
+        await run_blocking(service_profiles.build)
+        await run_blocking(service_index.load)
+        return await get_kb_status()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -42,67 +156,105 @@ async def validate_profile(lead_id: str = Path(...,description="Unique identifie
 
 
 # ----------------- PITCH GENERATION PORTION-------------------
+async def _load_pitch_context(db, lead_id: str):
+    """Returns (company_name, lead_context) used to prompt the pitch model."""
+    # 1. Fetch lead details
+    lead = await db.leads.find_one({"_id": ObjectId(lead_id)})
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+    
+    # 2-3. Company details + full context for the dynamic prompt
+    return await build_pitch_context(db, lead)
+
+async def _save_pitch(db, payload: PitchCreate, company_name: str, lead_context: dict, content: str) -> str:
+    # 4. Save pitch to database
+    pitch_doc = {
+        "lead_id": payload.lead_id,
+        "company_name": company_name,
+        "industry": lead_context["industry"],
+        "content": content,
+        "excerpt": pitch_excerpt(content),
+        "config": payload.config.dict(),
+        "services": payload.selected_services,
+        "generated_by": "Sarah Johnson",
+        "version": 1,
+        "status": "Active",
+        "created_at": datetime.now(timezone.utc)
+    }
+    
+    result = await db.pitches.insert_one(pitch_doc)
+    return str(result.inserted_id)
+
 @router.post("/intelligence/generate-pitch")
 async def generate_pitch(payload: PitchCreate):
     db = get_db()
     try:
-        # 1. Fetch lead details
-        lead = await db.leads.find_one({"_id": ObjectId(payload.lead_id)})
-        if not lead:
-            raise HTTPException(status_code=404, detail="Lead not found")
-        
-        # 2. Get company details for the pitch
-        company = await db.companies.find_one({"_id": lead["company_id"]})
-        company_name = company["name"] if company else lead.get("company_name", "Unknown")
-        company_size = company["size"] if company else "N/A"
+        company_name, lead_context = await _load_pitch_context(db, payload.lead_id)
         
-        # 3. Aggregate full context for dynamic prompt
-        extraction = lead.get("extraction_summary", {})
-        biz_context = lead.get("business_context", {})
+        # Pre-generated right after alignment when config + services match
+        content = await take_pitch_draft(db, payload.lead_id, lead_context, payload.selected_services, payload.config)
+        if content is None:
+            content = await generate_pitch_content(
+                lead_context,              # context of the lead get added
+                payload.selected_services, # matched services selected
+                payload.config
+            )
         
-        lead_context = {
-            "company_name": company_name,
-            "company_size": company_size,
-            "industry": lead.get("industry") or biz_context.get("industry", "Unknown"),
-            "pain_points": extraction.get("problems") or biz_context.get("pain_points_requirements_text", "No specific pain points reported"),
-            "business_identity": extraction.get("identity", "N/A"),
-            "business_intent": extraction.get("intent", "N/A"),
-            "tech_stack": extraction.get("technologies", "N/A"),
-            "budget": biz_context.get("estimated_budget", "Not specified"),
-            "timeline": biz_context.get("timeline", "Flexible")
-        }
-        
-        content = await generate_pitch_content(
-            lead_context,              # context of the lead get added
-            payload.selected_services, # matched services selected
-            payload.config
-        )
-        
-        # 4. Save pitch to database
-        pitch_doc = {
-            "lead_id": payload.lead_id,
-            "company_name": company_name,
-            "industry": lead_context["industry"],
-            "content": content,
-            "config": payload.config.dict(),
-            "services": payload.selected_services,
-            "generated_by": "Sarah Johnson",
-            "version": 1,
-            "status": "Active",
-            "created_at": datetime.now(timezone.utc)
-        }
-        
-        result = await db.pitches.insert_one(pitch_doc)
+        pitch_id = await _save_pitch(db, payload, company_name, lead_context, content)
         
         return {
-            "id": str(result.inserted_id),
+            "id": pitch_id,
             "content": content,
             "message": "Pitch generated and saved successfully"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error generating pitch: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/intelligence/generate-pitch/stream")
+async def generate_pitch_stream(payload: PitchCreate, request: Request):
+    """
+    SSE variant of generate-pitch: `token` events carry text as it is
+    generated, then `done` with the saved pitch id once the full pitch is
+    stored (same document as the non-streaming endpoint).
+    """
+    if not ObjectId.is_valid(payload.lead_id):
+        raise HTTPException(status_code=400, detail="Invalid lead id")
+
+    db = get_db()
+    try:
+        company_name, lead_context = await _load_pitch_context(db, payload.lead_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error streaming pitch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream():
+        chunks = []
+        try:
+            async for text in astream_pitch_content(lead_context, payload.selected_services, payload.config):
+                chunks.append(text)
+                yield _sse("token", {"text": text})
+                if await request.is_disconnected():
+                    # client gave up -> nothing is saved, like a failed request
+                    return
+
+            content = "".join(chunks).strip()
+            pitch_id = await _save_pitch(db, payload, company_name, lead_context, content)
+            yield _sse("done", {"id": pitch_id, "message": "Pitch generated and saved successfully"})
+        except Exception as e:
+            print(f"Error streaming pitch: {e}")
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/intelligence/regenerate-pitch")
 async def regenerate_pitch(payload: PitchRegenerate):
     db = get_db()
@@ -131,6 +283,7 @@ async def regenerate_pitch(payload: PitchRegenerate):
             "company_name": original_pitch["company_name"],
             "industry": original_pitch["industry"],
             "content": new_content,
+            "excerpt": pitch_excerpt(new_content),
             "config": config_dict,
             "services": original_pitch.get("services", []),
             "generated_by": "Sarah Johnson",
@@ -152,12 +305,37 @@ async def regenerate_pitch(payload: PitchRegenerate):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# The list renders metadata + the stored excerpt; full content comes from
+# GET /intelligence/pitches/{pitch_id}
+PITCH_LIST_PROJECTION = {
+    field: 1 for field in
+    ["lead_id", "company_name", "industry", "version", "created_at", "generated_by", "config", "services", "status", "excerpt"]
+}
+
+
 @router.get("/intelligence/pitches")
-async def get_pitches():
+async def get_pitches(
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    order: Literal["desc", "asc"] = Query("desc", description="created_at order"),
+    industry: Optional[str] = None,
+    owner: Optional[str] = None,
+    status: Optional[str] = None
+):
     db = get_db()
+    descending = order == "desc"
+    query = keyset_match(cursor, descending)
+    if industry:
+        query["industry"] = industry
+    if owner:
+        query["generated_by"] = owner
+    if status:
+        query["status"] = status
+
     try:
-        cursor = db.pitches.find().sort("created_at", -1)
-        pitches = await cursor.to_list(length=100)
+        rows = await db.pitches.find(query, PITCH_LIST_PROJECTION).sort(keyset_sort(descending)).limit(limit + 1).to_list(length=limit + 1)
+        pitches = page(rows, limit, response)
         
         return [
             {
@@ -174,8 +352,7 @@ async def get_pitches():
                 "focusAreas": p["config"].get("focusAreas", []),
                 "services": p.get("services", []),
                 "status": p.get("status", "Active"),
-                "content": p.get("content", ""),
-                "excerpt": p["content"][:200] + "..." if len(p["content"]) > 200 else p["content"]
+                "excerpt": p.get("excerpt", "")
             }
             for p in pitches
         ]
@@ -204,7 +381,7 @@ async def get_pitch(pitch_id: str):
             "services": p.get("services", []),
             "status": p.get("status", "Active"),
             "content": p.get("content", ""),
-            "excerpt": p["content"][:200] + "..." if len(p["content"]) > 200 else p["content"]
+            "excerpt": p.get("excerpt") or pitch_excerpt(p.get("content", ""))
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
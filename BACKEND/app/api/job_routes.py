@@ -0,0 +1,41 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
+from bson import ObjectId
+
+from app.models.job_schema import JobSubmit
+from app.services.job_queue import submit_job, get_job, serialize_job
+
+
+router = APIRouter()
+
+# ------------------- BACKGROUND JOBS ---------------------------------
+@router.post("/jobs", status_code=202)
+async def create_job(payload: JobSubmit):
+    """
+    Queues a service-alignment or profile-validation job and returns at
+    once. Poll GET /jobs/{job_id} and fetch GET /jobs/{job_id}/result.
+    """
+    if not ObjectId.is_valid(payload.lead_id):
+        raise HTTPException(status_code=400, detail="Invalid lead id")
+    job = await submit_job(payload.kind, {"lead_id": payload.lead_id})
+    return serialize_job(job)
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return serialize_job(job)
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    job = await get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in ("queued", "running"):
+        # not finished yet -> 202 so clients keep polling
+        return JSONResponse(status_code=202, content=jsonable_encoder(serialize_job(job)))
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job.get("error") or "Job failed")
+    return serialize_job(job, include_result=True)
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Annotated
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, Response
+from typing import Annotated, Literal, Optional
 from pydantic import Json
 from bson import ObjectId
 from pathlib import Path
@@ -10,6 +10,10 @@ import json
 
 
 from app.core.database import get_db
+from app.core.executor import run_blocking
+from app.core.index_specs import lead_list_pipeline
+from app.services.lead_documents import document_ref, store_document_text
+from app.core.pagination import MAX_PAGE_SIZE, keyset_match, page
 from app.models.lead_schema import LeadCreate
 
 router = APIRouter()
@@ -88,15 +92,12 @@ async def create_lead(
         doc_id = ObjectId()
         # Read file bytes for in-memory extraction
         file_content = await file.read()
-        extracted_text = extract_text_from_bytes(file_content, file.filename)
+        # PDF/DOCX parsing is CPU-bound, keep it off the event loop
+        extracted_text = await run_blocking(extract_text_from_bytes, file_content, file.filename)
         
-        lead_documents.append({
-            "_id": doc_id,
-            "original_name": file.filename,
-            "file_type": file.content_type,
-            "extracted_text": extracted_text, # STORES THE TEXT DIRECTLY
-            "uploaded_at": datetime.now(timezone.utc)
-        })
+        # Text goes to lead_documents (compressed); the lead keeps a reference + hash
+        await store_document_text(db, lead_id, doc_id, extracted_text)
+        lead_documents.append(document_ref(doc_id, file.filename, file.content_type, extracted_text))
 
     # -----------------------------
     # 4. Attach documents to lead
@@ -152,26 +153,45 @@ async def get_lead(lead_id: str):
 # LIST LEADS
 # -----------------------------
 @router.get("/leads")
-async def list_leads():
+async def list_leads(
+    response: Response,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    order: Literal["desc", "asc"] = Query("desc", description="created_at order"),
+    industry: Optional[str] = None,
+    owner: Optional[str] = None,
+    status: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None
+):
     db = get_db()
-    leads = await db.leads.find().sort("created_at", -1).to_list(100)
-    
-    results = []
-    for lead in leads:
-        company_id = lead.get("company_id")
-        company = None
-        if company_id:
-            company = await db.companies.find_one({"_id": company_id})
-            
-        results.append({
+    descending = order == "desc"
+
+    match = keyset_match(cursor, descending)
+    if industry:
+        match["industry"] = industry
+    if owner:
+        match["owner"] = owner
+    if status:
+        match["sales_qualification.lead_source"] = status
+    if min_score is not None or max_score is not None:
+        match["score"] = {
+            **({"$gte": min_score} if min_score is not None else {}),
+            **({"$lte": max_score} if max_score is not None else {})
+        }
+
+    leads = await db.leads.aggregate(lead_list_pipeline(limit + 1, match, descending)).to_list(limit + 1)
+
+    return [
+        {
             "id": str(lead["_id"]),
-            "companyName": company["name"] if company else lead.get("company_name", "Unknown"),
-            "industry": lead.get("industry") or (lead["business_context"].get("industry") if "business_context" in lead else "Unknown"),
-            "score": lead.get("score", 0),
-            "owner": lead.get("owner", "Sarah Johnson"),
-            "status": lead.get("sales_qualification", {}).get("lead_source", "New"),
-            "servicesCount": len(lead.get("matched_services", [])),
+            "companyName": lead["companyName"],
+            "industry": lead["industry"],
+            "score": lead["score"],
+            "owner": lead["owner"],
+            "status": lead["status"],
+            "servicesCount": lead["servicesCount"],
             "createdAt": lead["created_at"].isoformat()
-        })
-    return results
-
+        }
+        for lead in page(leads, limit, response)
+    ]
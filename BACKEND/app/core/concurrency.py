@@ -0,0 +1,97 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from app.core.config import LLM_MAX_CONCURRENCY, EMBEDDING_BATCH_WINDOW_MS, EMBEDDING_BATCH_SIZE
+from app.core.metrics import incr, observe, register_gauge
+
+# ---------------------------------------------------------------------
+# GLOBAL LLM CONCURRENCY CAP
+# ---------------------------------------------------------------------
+# Every LLM call on the alignment path takes a slot, so a 500-lead batch
+# can't open thousands of simultaneous completions against OpenAI.
+
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_llm_waiting = 0
+
+
+@asynccontextmanager
+async def llm_slot():
+    global _llm_waiting
+    _llm_waiting += 1
+    start = time.perf_counter()
+    try:
+        await _llm_semaphore.acquire()
+    finally:
+        _llm_waiting -= 1
+    observe("llm.slot_wait_ms", (time.perf_counter() - start) * 1000)
+    try:
+        yield
+    finally:
+        _llm_semaphore.release()
+
+
+register_gauge("llm.slots_waiting", lambda: _llm_waiting)
+register_gauge("llm.max_concurrency", lambda: LLM_MAX_CONCURRENCY)
+
+
+# ---------------------------------------------------------------------
+# EMBEDDING MICRO-BATCHER
+# ---------------------------------------------------------------------
+# Concurrent callers (e.g. many leads in a batch alignment) hand their
+# texts to one batcher. Texts that arrive within a short window are
+# de-duplicated and sent together, max_batch texts per request.
+
+
+class EmbeddingBatcher:
+    def __init__(self, embed_fn, window_ms: float = EMBEDDING_BATCH_WINDOW_MS, max_batch: int = EMBEDDING_BATCH_SIZE):
+        self._embed_fn = embed_fn
+        self._window = window_ms / 1000
+        self._max_batch = max_batch
+        self._pending = {}  # text -> futures waiting on its vector
+        self._flush_task = None
+        self._tasks = set()  # immediate flushes; referenced until done so they aren't GC'd mid-flight
+
+    async def embed(self, texts: list) -> list:
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self._pending.setdefault(text, []).append(future)
+            futures.append(future)
+
+        if len(self._pending) >= self._max_batch:
+            task = asyncio.ensure_future(self._flush(0))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        elif self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush(self._window))
+
+        return list(await asyncio.gather(*futures))
+
+    async def _flush(self, delay: float):
+        if delay:
+            await asyncio.sleep(delay)
+            self._flush_task = None
+
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        texts = list(pending.keys())
+        batches = [texts[i:i + self._max_batch] for i in range(0, len(texts), self._max_batch)]
+        results = await asyncio.gather(*[self._embed_fn(batch) for batch in batches], return_exceptions=True)
+
+        for batch, vectors in zip(batches, results):
+            for i, text in enumerate(batch):
+                for future in pending[text]:
+                    if future.done():
+                        continue
+                    if isinstance(vectors, BaseException):
+                        future.set_exception(vectors)
+                    else:
+                        future.set_result(vectors[i])
+
+        incr("embedding.requests", len(batches))
+        incr("embedding.texts_requested", sum(len(f) for f in pending.values()))
+        incr("embedding.texts_sent", len(texts))
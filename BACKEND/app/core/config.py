@@ -0,0 +1,169 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -----------------------------
+# VECTOR MATCHING
+# -----------------------------
+# "numpy" scores leads against the in-process service index,
+# "chroma" queries the Chroma collections directly.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "numpy").lower()
+
+# -----------------------------
+# CONCURRENCY
+# -----------------------------
+# Size of the shared thread pool for blocking work (Chroma, file parsing)
+BLOCKING_EXECUTOR_WORKERS = int(os.getenv("BLOCKING_EXECUTOR_WORKERS", "8"))
+
+# -----------------------------
+# LEAD SUMMARIZATION
+# -----------------------------
+# Documents are packed together (small ones) or split (long ones) into
+# chunks of at most this many tokens before the map step; a lead whose
+# documents fit in one chunk together is summarized in a single call.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "12000"))
+SUMMARY_CHUNK_OVERLAP = int(os.getenv("SUMMARY_CHUNK_OVERLAP", "200"))
+# Max concurrent chunk summaries per lead
+SUMMARY_MAP_CONCURRENCY = int(os.getenv("SUMMARY_MAP_CONCURRENCY", "4"))
+
+# -----------------------------
+# SCORE FUSION
+# -----------------------------
+# weighted_sum | rrf | max | average (legacy mean of top-k hits)
+SCORE_FUSION_STRATEGY = os.getenv("SCORE_FUSION_STRATEGY", "weighted_sum").lower()
+SCORE_RRF_K = int(os.getenv("SCORE_RRF_K", "60"))
+
+
+def _parse_weights(raw: str) -> dict:
+    # "technologies=1,capabilities=1.5,problems=2"; unlisted fields weigh 1
+    weights = {}
+    for pair in filter(None, (p.strip() for p in raw.split(","))):
+        field, _, value = pair.partition("=")
+        weights[field.strip()] = float(value)
+    return weights
+
+
+SCORE_FIELD_WEIGHTS = _parse_weights(os.getenv("SCORE_FIELD_WEIGHTS", ""))
+
+# -----------------------------
+# LLM / EMBEDDING THROUGHPUT
+# -----------------------------
+# Max LLM calls in flight across the whole process on the alignment path
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Leads processed at once by POST /intelligence/service-alignment/batch
+BATCH_ALIGNMENT_CONCURRENCY = int(os.getenv("BATCH_ALIGNMENT_CONCURRENCY", "8"))
+# Concurrent embedding requests are coalesced for this long (ms)
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "10"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+
+# -----------------------------
+# BACKGROUND JOBS
+# -----------------------------
+# Async workers started with the app; each runs one job at a time.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL_S = float(os.getenv("JOB_POLL_INTERVAL_S", "1.0"))
+# A running job whose lease isn't renewed for this long is treated as
+# crashed and re-queued (or failed once it has used up its attempts).
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "2"))
+# Per-kind timeouts in seconds
+JOB_TIMEOUTS = {
+    "service_alignment": float(os.getenv("JOB_TIMEOUT_SERVICE_ALIGNMENT_S", "300")),
+    "validate_profile": float(os.getenv("JOB_TIMEOUT_VALIDATE_PROFILE_S", "480")),
+}
+
+# -----------------------------
+# LLM HTTP POOLS
+# -----------------------------
+# Shared by every ChatOpenAI built through app.core.llm_clients
+LLM_HTTP_MAX_CONNECTIONS = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "64"))
+LLM_HTTP_MAX_KEEPALIVE = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "32"))
+LLM_HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY_S", "60"))
+LLM_HTTP_TIMEOUT_S = float(os.getenv("LLM_HTTP_TIMEOUT_S", "120"))
+
+# -----------------------------
+# LLM RESPONSE CACHE
+# -----------------------------
+# Disk cache for temperature-0 structured calls (see app.core.llm_cache)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+LLM_CACHE_TTL_S = float(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# -----------------------------
+# ALIGNMENT INFERENCE
+# -----------------------------
+# "per_service": one LLM call per matched service (streamed as they land)
+# "batched": one structured call for all top-N services, lead context sent once
+ALIGNMENT_INFERENCE_MODE = os.getenv("ALIGNMENT_INFERENCE_MODE", "per_service").lower()
+
+# -----------------------------
+# PROMPT BUDGETS
+# -----------------------------
+# Token budgets for the service knowledge block of the inference prompt.
+# Per-field overrides: "figures_context=800,identity=400"
+PROMPT_FIELD_TOKEN_BUDGET = int(os.getenv("PROMPT_FIELD_TOKEN_BUDGET", "600"))
+PROMPT_FIELD_BUDGETS = {
+    field: int(value) for field, value in _parse_weights(os.getenv("PROMPT_FIELD_BUDGETS", "")).items()
+}
+# Cap for all fields of one service together
+PROMPT_SERVICE_TOKEN_BUDGET = int(os.getenv("PROMPT_SERVICE_TOKEN_BUDGET", "3000"))
+
+# -----------------------------
+# OPENAI RATE GOVERNOR
+# -----------------------------
+# Per-model budgets; set to the organisation's OpenAI limits
+RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "500"))
+RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "200000"))
+EMBEDDING_RATE_LIMIT_RPM = float(os.getenv("EMBEDDING_RATE_LIMIT_RPM", "3000"))
+EMBEDDING_RATE_LIMIT_TPM = float(os.getenv("EMBEDDING_RATE_LIMIT_TPM", "1000000"))
+RATE_GOVERNOR_MAX_RETRIES = int(os.getenv("RATE_GOVERNOR_MAX_RETRIES", "4"))
+# Timeouts, connection resets and 5xx (the SDK default was 2 retries)
+LLM_TRANSIENT_MAX_RETRIES = int(os.getenv("LLM_TRANSIENT_MAX_RETRIES", "2"))
+# Completion tokens reserved per chat call (prompt tokens are counted)
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "800"))
+
+# -----------------------------
+# LLM CASSETTES
+# -----------------------------
+# off | record | replay (see app.core.llm_cassette)
+LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", ".cache/llm_cassette.jsonl")
+# error | any
+LLM_CASSETTE_ON_MISS = os.getenv("LLM_CASSETTE_ON_MISS", "error").lower()
+# recorded | fixed:<ms> | uniform:<min>,<max> | lognormal:<median>,<sigma>
+LLM_CASSETTE_LATENCY = os.getenv("LLM_CASSETTE_LATENCY", "recorded")
+LLM_CASSETTE_LATENCY_SCALE = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))
+LLM_CASSETTE_SEED = int(os.getenv("LLM_CASSETTE_SEED")) if os.getenv("LLM_CASSETTE_SEED") else None
+
+# -----------------------------
+# SPECULATIVE PITCH DRAFTS
+# -----------------------------
+# After alignment, pre-generate the default-config pitch for the top
+# services in the background (see app.services.pitch_drafts)
+PITCH_DRAFTS_ENABLED = os.getenv("PITCH_DRAFTS_ENABLED", "false").lower() in ("1", "true", "yes")
+PITCH_DRAFT_TOP_N = int(os.getenv("PITCH_DRAFT_TOP_N", "3"))
+PITCH_DRAFT_TTL_S = int(os.getenv("PITCH_DRAFT_TTL_S", "3600"))
+# How long generate-pitch waits for a matching draft that is still being written
+PITCH_DRAFT_WAIT_S = float(os.getenv("PITCH_DRAFT_WAIT_S", "10"))
+
+# -----------------------------
+# HEDGED LLM REQUESTS
+# -----------------------------
+# Opt-in: a call still running after the learned latency percentile gets a
+# duplicate request; the first to finish wins (see app.core.llm_hedging)
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "false").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Latency samples needed per call site before it starts hedging
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "1000"))
+# Max share of recent calls that may fire a hedge (caps the extra spend)
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+LLM_HEDGE_WINDOW = int(os.getenv("LLM_HEDGE_WINDOW", "500"))
+
+# -----------------------------
+# MONGO INDEXES
+# -----------------------------
+# Log a warning at startup for registered hot queries that plan a COLLSCAN
+INDEX_VERIFY_ON_STARTUP = os.getenv("INDEX_VERIFY_ON_STARTUP", "false").lower() in ("1", "true", "yes")
@@ -0,0 +1,81 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import BLOCKING_EXECUTOR_WORKERS
+from app.core.metrics import observe, register_gauge
+
+# ---------------------------------------------------------------------
+# SHARED BOUNDED EXECUTOR
+# ---------------------------------------------------------------------
+# One app-wide thread pool for the blocking work that has no async API
+# (Chroma calls, PDF/DOCX parsing). Requests used to create their own
+# ThreadPoolExecutor, which spawned unbounded threads under load; now the
+# pool size caps concurrency and the backlog is visible as a gauge.
+
+
+class BoundedExecutor:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="blocking"
+                    )
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def _track(self, fn, submitted_at: float):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        observe("executor.queue_wait_ms", (time.perf_counter() - submitted_at) * 1000)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs a blocking callable on the shared pool and awaits the result."""
+        call = functools.partial(fn, *args, **kwargs)
+        with self._lock:
+            self._queued += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_pool(), self._track, call, time.perf_counter()
+        )
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+blocking_executor = BoundedExecutor(BLOCKING_EXECUTOR_WORKERS)
+
+register_gauge("executor.queue_depth", lambda: blocking_executor.queue_depth)
+register_gauge("executor.active", lambda: blocking_executor.active)
+register_gauge("executor.max_workers", lambda: blocking_executor.max_workers)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    return await blocking_executor.run(fn, *args, **kwargs)
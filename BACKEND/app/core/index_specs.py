@@ -0,0 +1,109 @@
+from pymongo import ASCENDING, DESCENDING
+
+from app.core.indexes import index_manager
+from app.core.pagination import keyset_sort
+
+# ---------------------------------------------------------------------
+# INDEX + HOT QUERY DECLARATIONS
+# ---------------------------------------------------------------------
+# Every index the app needs and every query checked by
+# verify_query_plans(), in one module with no side effects beyond
+# registering them, so check_query_plans.py can import it without the
+# KB, OpenAI settings or the routers. The routes and services import
+# from here; app.main imports it before index_manager.ensure().
+#
+# The lead list pipeline lives here too: the plan check explains exactly
+# the pipeline GET /leads runs.
+
+
+# -----------------------------
+# LEADS + COMPANIES
+# -----------------------------
+def lead_list_pipeline(limit: int = 100, match: dict = None, descending: bool = True) -> list:
+    """
+    One round trip for the lead list: a page of leads joined with their
+    company, projected down to what the list view renders. Heavy fields
+    (documents, summaries, matched_services) never leave Mongo.
+    """
+    return [
+        {"$match": match or {}},
+        {"$sort": dict(keyset_sort(descending))},
+        {"$limit": limit},
+        {"$project": {
+            "company_id": 1,
+            "company_name": 1,
+            "industry": {"$ifNull": ["$industry", {"$ifNull": ["$business_context.industry", "Unknown"]}]},
+            "score": {"$ifNull": ["$score", 0]},
+            "owner": {"$ifNull": ["$owner", "Sarah Johnson"]},
+            "status": {"$ifNull": ["$sales_qualification.lead_source", "New"]},
+            "servicesCount": {"$size": {"$ifNull": ["$matched_services", []]}},
+            "created_at": 1
+        }},
+        {"$lookup": {"from": "companies", "localField": "company_id", "foreignField": "_id", "as": "company"}},
+        {"$project": {
+            "companyName": {"$ifNull": [
+                {"$arrayElemAt": ["$company.name", 0]},
+                {"$ifNull": ["$company_name", "Unknown"]}
+            ]},
+            "industry": 1,
+            "score": 1,
+            "owner": 1,
+            "status": 1,
+            "servicesCount": 1,
+            "created_at": 1
+        }}
+    ]
+
+
+# create_lead resolves companies by website
+index_manager.declare("companies", [("website", ASCENDING)])
+index_manager.hot_query("companies.by_website", "companies", {"website": "example.com"})
+
+# Compound indexes behind the list filters: equality field first, then the
+# (created_at, _id) keyset so each page is a bounded index range scan.
+for _keys in [
+    [("created_at", DESCENDING), ("_id", DESCENDING), ("score", ASCENDING)],
+    [("industry", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("owner", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("sales_qualification.lead_source", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+]:
+    index_manager.declare("leads", _keys)
+
+index_manager.hot_query("leads.list", "leads", pipeline=lead_list_pipeline(101))
+index_manager.hot_query("leads.list_by_industry", "leads", pipeline=lead_list_pipeline(101, {"industry": "Insurance"}))
+
+# extracted document text, see app.services.lead_documents
+index_manager.declare("lead_documents", [("lead_id", ASCENDING)])
+
+
+# -----------------------------
+# PITCHES
+# -----------------------------
+for _keys in [
+    [("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("industry", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("generated_by", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    # a lead's pitch history
+    [("lead_id", ASCENDING), ("created_at", DESCENDING)],
+]:
+    index_manager.declare("pitches", _keys)
+
+index_manager.hot_query("pitches.list", "pitches", sort=keyset_sort())
+index_manager.hot_query("pitches.by_lead", "pitches", {"lead_id": "000000000000000000000000"}, sort=[("created_at", DESCENDING)])
+
+# speculative drafts, see app.services.pitch_drafts; expire via TTL
+index_manager.declare("pitch_drafts", [("lead_id", ASCENDING)])
+index_manager.declare("pitch_drafts", [("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+
+# -----------------------------
+# JOBS
+# -----------------------------
+index_manager.declare("jobs", [("status", ASCENDING), ("created_at", ASCENDING)])
+index_manager.declare("jobs", [("dedupe_key", ASCENDING), ("status", ASCENDING)])
+# `active_key` (= dedupe_key) only exists while a job is queued or running, so
+# this makes "one active job per kind + lead" atomic across concurrent submits
+index_manager.declare("jobs", [("active_key", ASCENDING)], unique=True, partialFilterExpression={"active_key": {"$exists": True}})
+index_manager.hot_query("jobs.claim", "jobs", {"status": "queued"}, sort=[("created_at", ASCENDING)])
+index_manager.hot_query("jobs.dedupe", "jobs", {"active_key": "service_alignment:x"})
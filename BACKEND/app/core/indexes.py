@@ -0,0 +1,125 @@
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from app.core.database import get_db
+
+# ---------------------------------------------------------------------
+# MONGO INDEX MANAGER
+# ---------------------------------------------------------------------
+# The indexes the app's queries need are declared at import time, all in
+# app.core.index_specs:
+#
+#   index_manager.declare("companies", [("website", ASCENDING)])
+#
+# and the app lifespan calls ensure(), which creates them idempotently
+# (an existing identical index is a no-op).
+#
+# Hot queries are registered the same way. verify_query_plans() runs
+# explain() on each and reports any whose winning plan contains a
+# COLLSCAN, i.e. a query that no index serves; check_query_plans.py runs
+# it against a local mongod and exits non-zero on a collection scan.
+
+
+class QueryPlanError(RuntimeError):
+    pass
+
+
+class IndexManager:
+    def __init__(self):
+        self._indexes = {}
+        self._hot_queries = {}
+
+    def declare(self, collection: str, keys: list, **options):
+        specs = self._indexes.setdefault(collection, [])
+        if (keys, options) not in specs:
+            specs.append((keys, options))
+
+    def hot_query(self, name: str, collection: str, filter: dict = None, sort: list = None, pipeline: list = None):
+        """Registers a query to explain(); either filter (+ sort) or an aggregation pipeline."""
+        self._hot_queries[name] = {
+            "collection": collection,
+            "filter": filter or {},
+            "sort": sort,
+            "pipeline": pipeline
+        }
+
+    def declared(self) -> dict:
+        return {collection: [keys for keys, _ in specs] for collection, specs in self._indexes.items()}
+
+    # --------------------- CREATION ---------------------
+    async def ensure(self, db=None) -> int:
+        db = db if db is not None else get_db()
+        created = 0
+        for collection, specs in self._indexes.items():
+            for keys, options in specs:
+                try:
+                    await db[collection].create_indexes([IndexModel(keys, **options)])
+                    created += 1
+                except OperationFailure as e:
+                    # e.g. an index with the same keys but different options already exists
+                    print(f"[INDEXES] {collection} {keys}: {e}")
+        print(f"[INDEXES] {created} index(es) ensured on {len(self._indexes)} collection(s)")
+        return created
+
+    # --------------------- QUERY PLANS ---------------------
+    async def explain(self, db, query: dict) -> dict:
+        if query["pipeline"] is not None:
+            command = {"aggregate": query["collection"], "pipeline": query["pipeline"], "cursor": {}}
+        else:
+            command = {"find": query["collection"], "filter": query["filter"]}
+            if query["sort"]:
+                command["sort"] = dict(query["sort"])
+        return await db.command("explain", command, verbosity="queryPlanner")
+
+    async def verify_query_plans(self, db=None, strict: bool = False) -> list:
+        """
+        Returns one {"name", "collection", "stages", "collscan"} entry per hot
+        query. With strict=True, raises QueryPlanError if any plans a COLLSCAN.
+        """
+        db = db if db is not None else get_db()
+        report = []
+        for name, query in self._hot_queries.items():
+            stages = _winning_stages(await self.explain(db, query))
+            report.append({
+                "name": name,
+                "collection": query["collection"],
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages
+            })
+
+        scans = [entry["name"] for entry in report if entry["collscan"]]
+        if scans and strict:
+            raise QueryPlanError(f"Queries planned as collection scans: {', '.join(scans)}")
+        return report
+
+
+def _winning_stages(explain: dict) -> list:
+    """Stage names in every winningPlan of an explain() output (find or aggregate)."""
+    stages = []
+
+    def collect(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            for value in node.values():
+                collect(value)
+        elif isinstance(node, list):
+            for value in node:
+                collect(value)
+
+    def find_plans(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "winningPlan":
+                    collect(value)
+                elif key != "rejectedPlans":
+                    find_plans(value)
+        elif isinstance(node, list):
+            for value in node:
+                find_plans(value)
+
+    find_plans(explain)
+    return stages
+
+
+index_manager = IndexManager()
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import typing
+
+from app.core.config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_TTL_S, LLM_CACHE_MAX_BYTES
+from app.core.executor import run_blocking
+from app.core.metrics import incr, register_gauge
+
+# ---------------------------------------------------------------------
+# PERSISTENT LLM RESPONSE CACHE (sqlite)
+# ---------------------------------------------------------------------
+# Only temperature-0 calls are cached: their output is (close to)
+# deterministic, so re-running the same prompt against the same model
+# and schema can be answered from disk in milliseconds.
+#
+#   key      sha256(model, temperature, schema fields, prompt); the
+#            schema part hashes its fields, so editing a schema class
+#            invalidates its entries
+#   TTL      entries older than LLM_CACHE_TTL_S are treated as misses
+#   size     once the payloads exceed LLM_CACHE_MAX_BYTES the least
+#            recently used rows are evicted down to 90% of the cap
+#   bypass   LLM_CACHE_ENABLED=false, or bypass=True on a single call
+
+
+def llm_cache_key(model: str, temperature: float, schema_name: str, prompt: str) -> str:
+    raw = json.dumps([model, float(temperature), schema_name, prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def schema_fingerprint(schema) -> str:
+    """`Name:hash` of the schema's fields (pydantic JSON schema or TypedDict annotations)."""
+    if hasattr(schema, "model_json_schema"):
+        fields = json.dumps(schema.model_json_schema(), sort_keys=True, default=str)
+    else:
+        try:
+            fields = repr(sorted(typing.get_type_hints(schema).items()))
+        except Exception:
+            fields = repr(sorted(getattr(schema, "__annotations__", {}).items()))
+    digest = hashlib.sha256(fields.encode("utf-8")).hexdigest()[:16]
+    return f"{getattr(schema, '__name__', str(schema))}:{digest}"
+
+
+class LLMResponseCache:
+    def __init__(self, path: str, ttl_s: float, max_bytes: int):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    schema TEXT,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL
+                )"""
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache(last_used_at)")
+            self._bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT value, size, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row and now - row[2] > self.ttl_s:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                db.commit()
+                self._bytes -= row[1]
+                row = None
+            if row is None:
+                self.misses += 1
+                incr("llm_cache.misses")
+                return None
+            db.execute("UPDATE llm_cache SET last_used_at = ? WHERE key = ?", (now, key))
+            db.commit()
+
+        self.hits += 1
+        incr("llm_cache.hits")
+        return json.loads(row[0])
+
+    def set(self, key: str, value, model: str = "", schema: str = ""):
+        payload = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(payload.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            old = db.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, schema, value, size, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, schema, payload, size, now, now)
+            )
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict(db, now)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection, now: float):
+        # expired rows first, then least recently used down to 90% of the cap
+        db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_s,))
+        self._bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY last_used_at").fetchall():
+            if self._bytes <= target:
+                break
+            db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._bytes -= size
+            evicted += 1
+        if evicted:
+            incr("llm_cache.evictions", evicted)
+
+    def clear(self):
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM llm_cache")
+            db.commit()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {
+            "enabled": LLM_CACHE_ENABLED,
+            "path": self.path,
+            "rows": rows,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+llm_cache = LLMResponseCache(LLM_CACHE_PATH, LLM_CACHE_TTL_S, LLM_CACHE_MAX_BYTES)
+
+register_gauge("llm_cache.bytes", lambda: llm_cache._bytes)
+
+
+# ---------------------------------------------------------------------
+# CACHED STRUCTURED RUNNABLE
+# ---------------------------------------------------------------------
+# Drop-in for the with_structured_output runnable: same invoke/ainvoke on
+# a prompt string, plus bypass=True to force a fresh call.
+
+
+class CachedStructuredRunnable:
+    def __init__(self, runnable, schema, model: str, temperature: float):
+        self._runnable = runnable
+        self._schema = schema
+        self._schema_name = getattr(schema, "__name__", str(schema))
+        self._schema_key = schema_fingerprint(schema)
+        self._model = model
+        self._temperature = temperature
+
+    def _key(self, prompt) -> str:
+        return llm_cache_key(self._model, self._temperature, self._schema_key, str(prompt))
+
+    def _encode(self, result):
+        return result.model_dump() if hasattr(result, "model_dump") else result
+
+    def _decode(self, value):
+        # pydantic schemas are rebuilt; TypedDict schemas are plain dicts already
+        return self._schema.model_validate(value) if hasattr(self._schema, "model_validate") else value
+
+    def _store(self, key: str, result):
+        # the model call already succeeded; a cache write failure must not lose its result
+        try:
+            llm_cache.set(key, self._encode(result), self._model, self._schema_name)
+        except Exception as e:
+            incr("llm_cache.write_errors")
+            print(f"[LLM CACHE] write failed for {self._schema_name}: {e}")
+
+    def invoke(self, prompt, bypass: bool = False, **kwargs):
+        if bypass or not LLM_CACHE_ENABLED:
+            return self._runnable.invoke(prompt, **kwargs)
+
+        key = self._key(prompt)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return self._decode(cached)
+
+        result = self._runnable.invoke(prompt, **kwargs)
+        self._store(key, result)
+        return result
+
+    async def ainvoke(self, prompt, bypass: bool = False, **kwargs):
+        if bypass or not LLM_CACHE_ENABLED:
+            return await self._runnable.ainvoke(prompt, **kwargs)
+
+        key = self._key(prompt)
+        cached = await run_blocking(llm_cache.get, key)
+        if cached is not None:
+            return self._decode(cached)
+
+        result = await self._runnable.ainvoke(prompt, **kwargs)
+        await run_blocking(self._store, key, result)
+        return result
@@ -0,0 +1,315 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+import numpy as np
+
+from app.core.config import (
+    LLM_CASSETTE_MODE, LLM_CASSETTE_PATH, LLM_CASSETTE_ON_MISS,
+    LLM_CASSETTE_LATENCY, LLM_CASSETTE_LATENCY_SCALE, LLM_CASSETTE_SEED
+)
+from app.core.executor import run_blocking
+from app.core.metrics import incr, observe
+
+# ---------------------------------------------------------------------
+# LLM CASSETTES (record / replay)
+# ---------------------------------------------------------------------
+# LLM_CASSETTE_MODE=record   real OpenAI calls, every response (and its
+#                            latency) is appended to a JSONL cassette; async
+#                            callers write from the blocking executor
+# LLM_CASSETTE_MODE=replay   no network: responses come from the cassette,
+#                            after a simulated latency
+#
+# Lookups are keyed by (kind, model, schema, prompt) so a replay of the
+# same inputs is deterministic. With LLM_CASSETTE_ON_MISS=any an unseen
+# prompt gets a recorded response of the same kind/model/schema (picked by
+# hash), and unseen embedding texts get a deterministic pseudo-random
+# vector, so load tests can use leads that were never recorded.
+#
+# LLM_CASSETTE_LATENCY:
+#   recorded              the latency measured while recording (x scale)
+#   fixed:<ms>
+#   uniform:<min_ms>,<max_ms>
+#   lognormal:<median_ms>,<sigma>
+
+CASSETTE_ENABLED = LLM_CASSETTE_MODE in ("record", "replay")
+
+if LLM_CASSETTE_MODE == "replay":
+    # services refuse to run without a key; replay never uses it
+    os.environ.setdefault("OPENAI_API_KEY", "cassette-replay")
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+def cassette_key(kind: str, model: str, schema: str, prompt) -> str:
+    raw = json.dumps([kind, model, schema or "", str(prompt)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str, on_miss: str, latency: str, scale: float, seed=None):
+        self.path = path
+        self.mode = mode
+        self.on_miss = on_miss
+        self.scale = scale
+        self._latency = self._parse_latency(latency)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._records = None
+        self._groups = None
+
+    @staticmethod
+    def _parse_latency(spec: str):
+        name, _, args = (spec or "recorded").partition(":")
+        values = [float(v) for v in args.split(",") if v.strip()]
+        if name not in ("recorded", "fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown cassette latency distribution: {spec}")
+        return name, values
+
+    def _load(self):
+        if self._records is not None:
+            return
+        with self._lock:
+            if self._records is not None:
+                return
+            records, groups = {}, {}
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        records[record["key"]] = record
+                        groups.setdefault(record["group"], []).append(record["key"])
+            for keys in groups.values():
+                keys.sort()
+            self._records, self._groups = records, groups
+            print(f"[CASSETTE] {len(records)} recorded response(s) loaded from {self.path}")
+
+    # --------------------- RECORD ---------------------
+    @staticmethod
+    def _line(kind: str, model: str, schema: str, prompt, response, latency_ms: float) -> str:
+        record = {
+            "key": cassette_key(kind, model, schema, prompt),
+            "group": f"{kind}:{model}:{schema or ''}",
+            "kind": kind,
+            "model": model,
+            "schema": schema,
+            "response": response,
+            "latency_ms": round(latency_ms, 1),
+            "recorded_at": datetime.now(timezone.utc).isoformat()
+        }
+        return json.dumps(record, ensure_ascii=False, default=str)
+
+    def _append(self, lines: list):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(line + "\n" for line in lines))
+        incr("cassette.recorded", len(lines))
+
+    def record(self, kind: str, model: str, schema: str, prompt, response, latency_ms: float):
+        self._append([self._line(kind, model, schema, prompt, response, latency_ms)])
+
+    async def arecord(self, kind: str, model: str, schema: str, prompt, response, latency_ms: float):
+        await run_blocking(self.record, kind, model, schema, prompt, response, latency_ms)
+
+    # --------------------- REPLAY ---------------------
+    def lookup(self, kind: str, model: str, schema: str, prompt) -> dict:
+        self._load()
+        key = cassette_key(kind, model, schema, prompt)
+        record = self._records.get(key)
+        if record is not None:
+            incr("cassette.hits")
+            return record
+
+        incr("cassette.misses")
+        group = self._groups.get(f"{kind}:{model}:{schema or ''}")
+        if self.on_miss == "any" and group:
+            return self._records[group[int(key, 16) % len(group)]]
+        raise CassetteMiss(f"No recorded {kind} response for {model} {schema or ''} (key {key[:12]})")
+
+    def latency_s(self, record: dict = None) -> float:
+        name, values = self._latency
+        if name == "fixed":
+            ms = values[0]
+        elif name == "uniform":
+            ms = self._random.uniform(values[0], values[1])
+        elif name == "lognormal":
+            ms = self._random.lognormvariate(np.log(values[0]), values[1] if len(values) > 1 else 0.5)
+        else:
+            ms = (record or {}).get("latency_ms", 0.0)
+        return max(0.0, ms * self.scale) / 1000
+
+    def embedding_dim(self) -> int:
+        self._load()
+        for record in self._records.values():
+            if record["kind"] == "embedding":
+                return len(decode_vector(record["response"]))
+        return 3072
+
+
+cassette = Cassette(
+    LLM_CASSETTE_PATH, LLM_CASSETTE_MODE, LLM_CASSETTE_ON_MISS,
+    LLM_CASSETTE_LATENCY, LLM_CASSETTE_LATENCY_SCALE, LLM_CASSETTE_SEED
+)
+
+
+# ---------------------------------------------------------------------
+# (DE)SERIALIZATION
+# ---------------------------------------------------------------------
+def encode_vector(vector) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode("ascii")
+
+
+def decode_vector(blob: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(blob), dtype=np.float32)
+
+
+def _encode_chat(message) -> dict:
+    return {"content": message.content, "usage_metadata": getattr(message, "usage_metadata", None)}
+
+
+def _decode_chat(data: dict):
+    from langchain_core.messages import AIMessage
+    return AIMessage(content=data["content"], usage_metadata=data.get("usage_metadata"))
+
+
+# ---------------------------------------------------------------------
+# CASSETTE RUNNABLE
+# ---------------------------------------------------------------------
+# Innermost wrapper around a ChatOpenAI ("chat") or structured-output
+# ("structured") runnable, so the governor and response cache above it
+# behave the same in replay as against the real API.
+
+
+class CassetteRunnable:
+    def __init__(self, runnable, model: str, schema=None):
+        self._runnable = runnable
+        self._model = model
+        self._schema = schema
+        self._schema_name = getattr(schema, "__name__", None)
+        self._kind = "structured" if schema is not None else "chat"
+
+    def __getattr__(self, name):
+        return getattr(self._runnable, name)
+
+    def _encode(self, result):
+        if self._kind == "chat":
+            return _encode_chat(result)
+        return result.model_dump() if hasattr(result, "model_dump") else result
+
+    def _decode(self, data):
+        if self._kind == "chat":
+            return _decode_chat(data)
+        return self._schema.model_validate(data) if hasattr(self._schema, "model_validate") else data
+
+    def _lookup(self, prompt) -> dict:
+        return cassette.lookup(self._kind, self._model, self._schema_name, prompt)
+
+    def invoke(self, prompt, **kwargs):
+        if cassette.mode == "replay":
+            record = self._lookup(prompt)
+            delay = cassette.latency_s(record)
+            time.sleep(delay)
+            observe("cassette.simulated_ms", delay * 1000)
+            return self._decode(record["response"])
+
+        start = time.perf_counter()
+        result = self._runnable.invoke(prompt, **kwargs)
+        cassette.record(self._kind, self._model, self._schema_name, prompt, self._encode(result), (time.perf_counter() - start) * 1000)
+        return result
+
+    async def ainvoke(self, prompt, **kwargs):
+        if cassette.mode == "replay":
+            record = self._lookup(prompt)
+            delay = cassette.latency_s(record)
+            await asyncio.sleep(delay)
+            observe("cassette.simulated_ms", delay * 1000)
+            return self._decode(record["response"])
+
+        start = time.perf_counter()
+        result = await self._runnable.ainvoke(prompt, **kwargs)
+        await cassette.arecord(self._kind, self._model, self._schema_name, prompt, self._encode(result), (time.perf_counter() - start) * 1000)
+        return result
+
+    async def astream(self, prompt, **kwargs):
+        from langchain_core.messages import AIMessageChunk
+
+        if cassette.mode == "replay":
+            record = self._lookup(prompt)
+            content = record["response"]["content"]
+            delay = cassette.latency_s(record)
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+            # ~30% of the time goes to the first token, the rest is spread evenly
+            await asyncio.sleep(delay * 0.3)
+            for piece in pieces:
+                yield AIMessageChunk(content=piece)
+                await asyncio.sleep(delay * 0.7 / len(pieces))
+            return
+
+        start = time.perf_counter()
+        parts = []
+        async for chunk in self._runnable.astream(prompt, **kwargs):
+            parts.append(chunk.content or "")
+            yield chunk
+        await cassette.arecord("chat", self._model, None, prompt, {"content": "".join(parts)}, (time.perf_counter() - start) * 1000)
+
+
+# ---------------------------------------------------------------------
+# EMBEDDINGS
+# ---------------------------------------------------------------------
+def _replay_vector(model: str, text: str, dim: int):
+    """(vector, its record or None for an unseen text)."""
+    try:
+        record = cassette.lookup("embedding", model, None, text)
+        return decode_vector(record["response"]), record
+    except CassetteMiss:
+        if cassette.on_miss != "any":
+            raise
+    # unseen text -> stable pseudo-random unit vector
+    seed = int(cassette_key("embedding", model, None, text)[:16], 16)
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector), None
+
+
+def replay_embeddings(model: str, texts: list):
+    """
+    Returns (vectors, simulated latency in s). Every text of a recorded
+    request carries that request's latency, so the slowest one stands for
+    the whole batch.
+    """
+    dim = cassette.embedding_dim()
+    replayed = [_replay_vector(model, text, dim) for text in texts]
+    records = [record for _, record in replayed if record is not None]
+    slowest = max(records, key=lambda r: r.get("latency_ms", 0.0), default=None)
+    return [vector for vector, _ in replayed], cassette.latency_s(slowest)
+
+
+def record_embeddings(model: str, texts: list, vectors: list, latency_ms: float):
+    cassette._append([
+        cassette._line("embedding", model, None, text, encode_vector(vector), latency_ms)
+        for text, vector in zip(texts, vectors)
+    ])
+
+
+async def aembed_with_cassette(model: str, texts: list, embed):
+    """Runs `await embed(texts)` through the cassette (record/replay)."""
+    if cassette.mode == "replay":
+        vectors, delay = replay_embeddings(model, texts)
+        await asyncio.sleep(delay)
+        observe("cassette.simulated_ms", delay * 1000)
+        return vectors
+
+    start = time.perf_counter()
+    vectors = await embed(texts)
+    if cassette.mode == "record":
+        await run_blocking(record_embeddings, model, texts, vectors, (time.perf_counter() - start) * 1000)
+    return vectors
@@ -0,0 +1,178 @@
+import os
+import threading
+import httpx
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+from app.core.config import LLM_HTTP_MAX_CONNECTIONS, LLM_HTTP_MAX_KEEPALIVE, LLM_HTTP_KEEPALIVE_EXPIRY_S, LLM_HTTP_TIMEOUT_S
+from app.core.metrics import incr, register_gauge
+from app.core.llm_cache import CachedStructuredRunnable, llm_cache
+from app.core.rate_governor import GovernedRunnable
+from app.core.llm_cassette import CASSETTE_ENABLED, CassetteRunnable
+
+load_dotenv()
+
+DEFAULT_CHAT_MODEL = "gpt-4o-mini"
+
+# ---------------------------------------------------------------------
+# SHARED LLM CLIENT REGISTRY
+# ---------------------------------------------------------------------
+# Services used to build a new ChatOpenAI (and a new structured-output
+# wrapper) on every call, i.e. a fresh HTTP client + TLS handshake +
+# schema compilation per request. All chat models now share one pair of
+# keep-alive httpx pools, and chat / structured runnables are built once
+# per (schema, model, temperature) and reused.
+#
+# Modules declare the runnables they use at import time; the app lifespan
+# calls start() to open the pools and prebuild them. Anything not
+# declared is built on first use, so scripts work without the lifespan.
+#
+# Every runnable handed out goes through the rate governor
+# (app.core.rate_governor); structured runnables at temperature 0 are
+# additionally wrapped with the persistent response cache
+# (app.core.llm_cache), outside the governor so hits cost no quota.
+# In cassette mode (app.core.llm_cassette) the innermost call is recorded
+# or replayed instead of going to OpenAI.
+
+
+class LLMClientRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._http_async_client = None
+        self._raw_chat = {}
+        self._chat = {}
+        self._structured = {}
+        self._declared = set()
+        self.builds = 0
+        self.hits = 0
+
+    # --------------------- HTTP POOLS ---------------------
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_EXPIRY_S
+        )
+
+    def _ensure_http(self):
+        if self._http_async_client is None:
+            timeout = httpx.Timeout(LLM_HTTP_TIMEOUT_S, connect=10.0)
+            self._http_client = httpx.Client(limits=self._limits(), timeout=timeout)
+            self._http_async_client = httpx.AsyncClient(limits=self._limits(), timeout=timeout)
+
+    # --------------------- RUNNABLES ---------------------
+    def _raw(self, model: str, temperature: float) -> ChatOpenAI:
+        key = (model, float(temperature))
+        with self._lock:
+            if key not in self._raw_chat:
+                self._ensure_http()
+                self._raw_chat[key] = ChatOpenAI(
+                    api_key=os.getenv("OPENAI_API_KEY"),
+                    model=model,
+                    temperature=temperature,
+                    # 429s (Retry-After) and timeouts / 5xx are retried by the rate governor
+                    max_retries=0,
+                    http_client=self._http_client,
+                    http_async_client=self._http_async_client
+                )
+            return self._raw_chat[key]
+
+    def chat(self, model: str = DEFAULT_CHAT_MODEL, temperature: float = 0) -> GovernedRunnable:
+        key = (model, float(temperature))
+        llm = self._chat.get(key)
+        if llm is not None:
+            self.hits += 1
+            return llm
+
+        raw = self._raw(model, temperature)
+        with self._lock:
+            if key not in self._chat:
+                inner = CassetteRunnable(raw, model) if CASSETTE_ENABLED else raw
+                self._chat[key] = GovernedRunnable(inner, model)
+                self.builds += 1
+                incr("llm_clients.builds")
+            return self._chat[key]
+
+    def structured(self, schema, model: str = DEFAULT_CHAT_MODEL, temperature: float = 0):
+        key = (schema, model, float(temperature))
+        runnable = self._structured.get(key)
+        if runnable is not None:
+            self.hits += 1
+            return runnable
+
+        llm = self._raw(model, temperature)
+        with self._lock:
+            if key not in self._structured:
+                runnable = llm.with_structured_output(schema)
+                if CASSETTE_ENABLED:
+                    runnable = CassetteRunnable(runnable, model, schema)
+                runnable = GovernedRunnable(runnable, model)
+                if float(temperature) == 0:
+                    runnable = CachedStructuredRunnable(runnable, schema, model, temperature)
+                self._structured[key] = runnable
+                self.builds += 1
+                incr("llm_clients.builds")
+            return self._structured[key]
+
+    def declare(self, schema=None, model: str = DEFAULT_CHAT_MODEL, temperature: float = 0):
+        """Registers a runnable to prebuild in start(); schema=None means a plain chat model."""
+        self._declared.add((schema, model, float(temperature)))
+
+    # --------------------- LIFECYCLE ---------------------
+    def start(self):
+        self._ensure_http()
+        for schema, model, temperature in list(self._declared):
+            if schema is None:
+                self.chat(model, temperature)
+            else:
+                self.structured(schema, model, temperature)
+        print(f"[LLM CLIENTS] {len(self._chat)} chat model(s), {len(self._structured)} structured runnable(s) ready")
+
+    async def aclose(self):
+        with self._lock:
+            sync_client, self._http_client = self._http_client, None
+            async_client, self._http_async_client = self._http_async_client, None
+            self._raw_chat.clear()
+            self._chat.clear()
+            self._structured.clear()
+        if async_client is not None:
+            await async_client.aclose()
+        if sync_client is not None:
+            sync_client.close()
+
+    def _pool_connections(self, client) -> dict:
+        # httpx doesn't expose pool state publicly; read it from httpcore
+        try:
+            connections = client._transport._pool.connections
+        except AttributeError:
+            return {}
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"open": len(connections), "idle": idle, "in_use": len(connections) - idle}
+
+    def stats(self) -> dict:
+        return {
+            "chat_models": [f"{model}@{temperature}" for model, temperature in self._chat],
+            "structured": [
+                f"{getattr(schema, '__name__', schema)}:{model}@{temperature}"
+                for schema, model, temperature in self._structured
+            ],
+            "builds": self.builds,
+            "hits": self.hits,
+            "limits": {
+                "max_connections": LLM_HTTP_MAX_CONNECTIONS,
+                "max_keepalive": LLM_HTTP_MAX_KEEPALIVE,
+                "keepalive_expiry_s": LLM_HTTP_KEEPALIVE_EXPIRY_S
+            },
+            "async_pool": self._pool_connections(self._http_async_client) if self._http_async_client else {},
+            "sync_pool": self._pool_connections(self._http_client) if self._http_client else {},
+            "response_cache": llm_cache.stats(),
+        }
+
+
+llm_clients = LLMClientRegistry()
+
+register_gauge(
+    "llm_clients.async_pool_open",
+    lambda: llm_clients._pool_connections(llm_clients._http_async_client).get("open", 0) if llm_clients._http_async_client else 0
+)
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+import time
+from collections import deque
+
+from app.core.config import (
+    LLM_HEDGING_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MIN_DELAY_MS, LLM_HEDGE_BUDGET, LLM_HEDGE_WINDOW
+)
+from app.core.concurrency import llm_slot
+from app.core.metrics import incr, observe, register_gauge
+
+# ---------------------------------------------------------------------
+# HEDGED LLM REQUESTS
+# ---------------------------------------------------------------------
+# Tail latency of alignment inference and pitch generation comes from the
+# occasional slow upstream response, and gather() waits for the slowest
+# call. A hedged call site learns its own latency distribution; when a
+# call is still running after the LLM_HEDGE_PERCENTILE latency, the same
+# request is sent again and whichever answer lands first is used, the
+# other is cancelled.
+#
+# Hedges are capped at LLM_HEDGE_BUDGET of the call site's recent calls,
+# take their own llm_slot (the caller's slot covers the primary only) and
+# go through the rate governor like any other call.
+#
+# A hedged call never tells how long the primary would have taken, only
+# that it exceeded the threshold: it is recorded censored at the
+# threshold, so the percentile doesn't drift down as hedges win, and it
+# is left out of the tail mean.
+#
+#   model = hedged(llm_clients.chat("gpt-4o-mini", 0.3), "pitch")
+#
+# Only ainvoke is hedged; everything else is passed through. Use one name
+# per runnable. With LLM_HEDGING_ENABLED off, hedged() returns the
+# runnable unchanged.
+
+
+class HedgeStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LLM_HEDGE_WINDOW)
+        self._hedged = deque(maxlen=LLM_HEDGE_WINDOW)
+
+    def record(self, latency_ms: float, hedged: bool):
+        """latency_ms of a hedged call is a lower bound of the primary's latency."""
+        with self._lock:
+            self._latencies.append(latency_ms)
+            self._hedged.append(hedged)
+
+    def threshold_ms(self):
+        """Learned hedge delay, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < LLM_HEDGE_MIN_SAMPLES:
+                return None
+            values = sorted(self._latencies)
+        index = min(len(values) - 1, int(LLM_HEDGE_PERCENTILE / 100 * len(values)))
+        return max(LLM_HEDGE_MIN_DELAY_MS, values[index])
+
+    def tail_mean_ms(self, threshold: float):
+        """Mean latency of past calls slower than threshold (expected cost of not hedging)."""
+        with self._lock:
+            tail = [
+                value for value, hedged in zip(self._latencies, self._hedged)
+                if value > threshold and not hedged
+            ]
+        return sum(tail) / len(tail) if tail else None
+
+    def within_budget(self) -> bool:
+        with self._lock:
+            return sum(self._hedged) < LLM_HEDGE_BUDGET * max(len(self._hedged), 1)
+
+    def hedge_rate(self) -> float:
+        with self._lock:
+            return sum(self._hedged) / len(self._hedged) if self._hedged else 0.0
+
+
+class HedgedRunnable:
+    def __init__(self, runnable, name: str):
+        self._runnable = runnable
+        self.stats = HedgeStats(name)
+        register_gauge(f"llm_hedge.rate.{name}", self.stats.hedge_rate)
+
+    def __getattr__(self, name):
+        return getattr(self._runnable, name)
+
+    async def ainvoke(self, prompt, **kwargs):
+        name = self.stats.name
+        start = time.perf_counter()
+        elapsed_ms = lambda: (time.perf_counter() - start) * 1000
+        primary = asyncio.ensure_future(self._runnable.ainvoke(prompt, **kwargs))
+
+        threshold = self.stats.threshold_ms()
+        try:
+            if threshold is not None:
+                done, _ = await asyncio.wait({primary}, timeout=threshold / 1000)
+            if threshold is None or done or not self.stats.within_budget():
+                result = await primary
+                self.stats.record(elapsed_ms(), False)
+                return result
+        except BaseException:
+            primary.cancel()
+            raise
+
+        incr(f"llm_hedge.fired.{name}")
+        hedge = asyncio.ensure_future(self._hedge(prompt, **kwargs))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if not task.exception()), None)
+                if winner is not None:
+                    break
+            else:
+                # both failed: surface the primary's error
+                raise primary.exception()
+        finally:
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+        latency = elapsed_ms()
+        if winner is hedge:
+            incr(f"llm_hedge.won.{name}")
+            expected = self.stats.tail_mean_ms(threshold)
+            if expected is not None:
+                observe(f"llm_hedge.saved_ms.{name}", max(0.0, expected - latency))
+        # censored: the primary took at least the threshold, however the race ended
+        self.stats.record(max(latency, threshold), True)
+        return winner.result()
+
+    async def _hedge(self, prompt, **kwargs):
+        async with llm_slot():
+            return await self._runnable.ainvoke(prompt, **kwargs)
+
+
+_hedged = {}
+_lock = threading.Lock()
+
+
+def hedged(runnable, name: str):
+    """Returns the hedging wrapper for this call site; its latency stats outlive client rebuilds."""
+    if not LLM_HEDGING_ENABLED:
+        return runnable
+    wrapper = _hedged.get(name)
+    if wrapper is None:
+        with _lock:
+            wrapper = _hedged.get(name)
+            if wrapper is None:
+                wrapper = _hedged[name] = HedgedRunnable(runnable, name)
+    wrapper._runnable = runnable
+    return wrapper
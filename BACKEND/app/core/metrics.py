@@ -0,0 +1,97 @@
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# -----------------------------
+# IN-PROCESS METRICS REGISTRY
+# -----------------------------
+# Lightweight counters / histograms kept in memory and exposed through
+# GET /metrics. Histograms keep a bounded reservoir of recent samples so
+# percentiles reflect current behaviour without growing unbounded.
+
+HISTOGRAM_WINDOW = 1000
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_histograms = defaultdict(lambda: deque(maxlen=HISTOGRAM_WINDOW))
+_histogram_totals = defaultdict(lambda: {"count": 0, "sum": 0.0})
+_gauges = {}
+
+
+def incr(name: str, value: float = 1.0):
+    with _lock:
+        _counters[name] += value
+
+
+def observe(name: str, value: float):
+    with _lock:
+        _histograms[name].append(value)
+        totals = _histogram_totals[name]
+        totals["count"] += 1
+        totals["sum"] += value
+
+
+def register_gauge(name: str, read_fn):
+    """Registers a callable sampled on every snapshot (queue depths, pool sizes)."""
+    with _lock:
+        _gauges[name] = read_fn
+
+
+def _percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def histogram_summary(name: str) -> dict:
+    with _lock:
+        values = sorted(_histograms.get(name, ()))
+        totals = dict(_histogram_totals.get(name, {"count": 0, "sum": 0.0}))
+
+    return {
+        "count": totals["count"],
+        "sum": round(totals["sum"], 3),
+        "p50": round(_percentile(values, 50), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "p99": round(_percentile(values, 99), 3),
+        "max": round(values[-1], 3) if values else 0.0,
+    }
+
+
+def snapshot() -> dict:
+    with _lock:
+        counters = dict(_counters)
+        histogram_names = list(_histograms.keys())
+        gauges = dict(_gauges)
+
+    gauge_values = {}
+    for name, read_fn in gauges.items():
+        try:
+            gauge_values[name] = read_fn()
+        except Exception as e:
+            gauge_values[name] = f"error: {e}"
+
+    return {
+        "counters": counters,
+        "gauges": gauge_values,
+        "histograms": {name: histogram_summary(name) for name in histogram_names},
+    }
+
+
+@contextmanager
+def timed(name: str, timings: dict = None):
+    """
+    Measures the wrapped block in milliseconds and records it under `name`.
+    When a `timings` dict is given the duration is also stored there so
+    callers can log a per-request stage breakdown.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        observe(name, elapsed_ms)
+        if timings is not None:
+            timings[name.rsplit(".", 1)[-1]] = round(elapsed_ms, 1)
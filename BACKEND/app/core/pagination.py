@@ -0,0 +1,63 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+# -----------------------------
+# KEYSET PAGINATION
+# -----------------------------
+# List endpoints page on (created_at, _id): the next page starts strictly
+# after the last row of the previous one, so every page is an index range
+# scan of `limit` rows no matter how deep the client has paged (unlike
+# skip/offset). The cursor is opaque to clients: base64 of the last row's
+# sort key. It is returned in the X-Next-Cursor header so list responses
+# keep their shape; no header means there are no more rows.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps({"t": doc["created_at"].isoformat(), "id": str(doc["_id"])})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """Returns (created_at, _id); 400 on a cursor this API didn't issue."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["t"]), ObjectId(data["id"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_sort(descending: bool = True) -> list:
+    direction = DESCENDING if descending else ASCENDING
+    return [("created_at", direction), ("_id", direction)]
+
+
+def keyset_match(cursor: str = None, descending: bool = True) -> dict:
+    """Filter for the rows after `cursor` in (created_at, _id) order."""
+    if not cursor:
+        return {}
+    created_at, last_id = decode_cursor(cursor)
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {"created_at": {op: created_at}},
+        {"created_at": created_at, "_id": {op: last_id}}
+    ]}
+
+
+def page(rows: list, limit: int, response):
+    """
+    Rows are fetched with limit + 1 so the last page doesn't need an extra
+    empty request; sets the next-cursor header and returns the page.
+    """
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1])
+    return rows
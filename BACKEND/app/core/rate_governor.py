@@ -0,0 +1,270 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from openai import RateLimitError, APIConnectionError, InternalServerError
+
+from app.core.config import (
+    RATE_LIMIT_RPM, RATE_LIMIT_TPM, EMBEDDING_RATE_LIMIT_RPM, EMBEDDING_RATE_LIMIT_TPM,
+    RATE_GOVERNOR_MAX_RETRIES, LLM_TRANSIENT_MAX_RETRIES, LLM_EXPECTED_OUTPUT_TOKENS
+)
+from app.core.metrics import incr, observe, register_gauge
+from app.core.tokens import count_tokens
+
+# ---------------------------------------------------------------------
+# GLOBAL OPENAI RATE GOVERNOR
+# ---------------------------------------------------------------------
+# Every OpenAI call made through llm_clients / aembed_texts takes capacity
+# from a per-model pair of token buckets (requests/min and tokens/min)
+# before it is sent, so concurrent features stop tripping 429s together.
+#
+# Lanes: a caller in a lower-priority lane waits while any higher-priority
+# caller for the same model is waiting, so interactive work (pitch,
+# single-lead alignment) goes ahead of background jobs and ingestion.
+#
+# On a 429 the model is paused for Retry-After (or an exponential backoff)
+# and the call is retried, instead of surfacing as fallback text.
+#
+# The OpenAI clients run with max_retries=0 so 429s are not retried twice;
+# the SDK's other retries (timeouts, dropped connections, 5xx) happen here
+# instead, with backoff, up to LLM_TRANSIENT_MAX_RETRIES times.
+
+# APITimeoutError is an APIConnectionError
+TRANSIENT_ERRORS = (APIConnectionError, InternalServerError)
+
+LANES = ("interactive", "background", "batch")
+
+_current_lane = ContextVar("llm_lane", default="interactive")
+
+
+@contextmanager
+def llm_lane(lane: str):
+    """Runs the enclosed LLM calls in the given priority lane."""
+    if lane not in LANES:
+        raise ValueError(f"Unknown LLM lane: {lane}")
+    token = _current_lane.set(lane)
+    try:
+        yield
+    finally:
+        _current_lane.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # a single request bigger than the bucket only waits for a full bucket
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class ModelGovernor:
+    def __init__(self, model: str, rpm: float, tpm: float):
+        self.model = model
+        self._requests = TokenBucket(rpm)
+        self._tokens = TokenBucket(tpm)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self.waiting = {lane: 0 for lane in LANES}
+
+    def _try_take(self, tokens: int) -> float:
+        """Takes capacity and returns 0, or returns how long to wait."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            wait = max(self._requests.wait_time(1, now), self._tokens.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            self._requests.level -= 1
+            self._tokens.level -= min(tokens, self._tokens.capacity)
+            return 0.0
+
+    def _blocked_by_higher_lane(self, lane: str) -> bool:
+        return any(self.waiting[other] for other in LANES[:LANES.index(lane)])
+
+    async def acquire(self, tokens: int, lane: str = None):
+        lane = lane or _current_lane.get()
+        start = time.perf_counter()
+        self.waiting[lane] += 1
+        try:
+            while True:
+                if self._blocked_by_higher_lane(lane):
+                    await asyncio.sleep(0.05)
+                    continue
+                wait = self._try_take(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self.waiting[lane] -= 1
+        observe(f"rate_governor.wait_ms.{lane}", (time.perf_counter() - start) * 1000)
+
+    def acquire_sync(self, tokens: int):
+        # Sync callers (scripts, legacy paths) run in worker threads; they
+        # share the buckets but don't take part in lane ordering.
+        start = time.perf_counter()
+        while True:
+            wait = self._try_take(tokens)
+            if wait <= 0:
+                break
+            time.sleep(min(wait, 1.0))
+        observe("rate_governor.wait_ms.sync", (time.perf_counter() - start) * 1000)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RateGovernor:
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def for_model(self, model: str) -> ModelGovernor:
+        governor = self._models.get(model)
+        if governor is None:
+            with self._lock:
+                governor = self._models.get(model)
+                if governor is None:
+                    if model.startswith("text-embedding"):
+                        governor = ModelGovernor(model, EMBEDDING_RATE_LIMIT_RPM, EMBEDDING_RATE_LIMIT_TPM)
+                    else:
+                        governor = ModelGovernor(model, RATE_LIMIT_RPM, RATE_LIMIT_TPM)
+                    self._models[model] = governor
+        return governor
+
+    def waiting(self, lane: str) -> int:
+        return sum(governor.waiting[lane] for governor in list(self._models.values()))
+
+
+rate_governor = RateGovernor()
+
+for _lane in LANES:
+    register_gauge(f"rate_governor.waiting.{_lane}", lambda lane=_lane: rate_governor.waiting(lane))
+
+
+def retry_after_seconds(error: Exception, attempt: int) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return min(60.0, 2 ** attempt) + random.uniform(0, 0.5)
+
+
+class _Retries:
+    """Attempt counters of one governed call; returns how long to back off, or raises."""
+    def __init__(self, model: str):
+        self.model = model
+        self.rate_limited = 0
+        self.transient = 0
+
+    def backoff(self, error: Exception, governor: ModelGovernor) -> float:
+        if isinstance(error, RateLimitError):
+            incr("rate_governor.429")
+            if self.rate_limited >= RATE_GOVERNOR_MAX_RETRIES:
+                raise error
+            delay = retry_after_seconds(error, self.rate_limited)
+            self.rate_limited += 1
+            print(f"[RATE GOVERNOR] 429 on {self.model}, backing off {delay:.1f}s")
+            # the whole model waits, not just this call
+            governor.pause(delay)
+            return 0.0
+
+        incr("rate_governor.transient_errors")
+        if self.transient >= LLM_TRANSIENT_MAX_RETRIES:
+            raise error
+        delay = retry_after_seconds(error, self.transient)
+        self.transient += 1
+        print(f"[RATE GOVERNOR] {type(error).__name__} on {self.model}, retrying in {delay:.1f}s")
+        return delay
+
+
+async def governed_call(model: str, tokens: int, call):
+    """Awaits call() under the governor, retrying 429s (Retry-After) and transient errors."""
+    governor = rate_governor.for_model(model)
+    retries = _Retries(model)
+    while True:
+        await governor.acquire(tokens)
+        try:
+            return await call()
+        except (RateLimitError, *TRANSIENT_ERRORS) as e:
+            delay = retries.backoff(e, governor)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def governed_call_sync(model: str, tokens: int, call):
+    governor = rate_governor.for_model(model)
+    retries = _Retries(model)
+    while True:
+        governor.acquire_sync(tokens)
+        try:
+            return call()
+        except (RateLimitError, *TRANSIENT_ERRORS) as e:
+            delay = retries.backoff(e, governor)
+        if delay:
+            time.sleep(delay)
+
+
+def estimate_tokens(prompt) -> int:
+    return count_tokens(str(prompt)) + LLM_EXPECTED_OUTPUT_TOKENS
+
+
+# ---------------------------------------------------------------------
+# GOVERNED RUNNABLE
+# ---------------------------------------------------------------------
+# Wraps a ChatOpenAI or structured-output runnable; invoke / ainvoke /
+# astream go through the governor, everything else is passed through.
+
+
+class GovernedRunnable:
+    def __init__(self, runnable, model: str):
+        self._runnable = runnable
+        self._model = model
+
+    def __getattr__(self, name):
+        return getattr(self._runnable, name)
+
+    def invoke(self, prompt, **kwargs):
+        return governed_call_sync(self._model, estimate_tokens(prompt), lambda: self._runnable.invoke(prompt, **kwargs))
+
+    async def ainvoke(self, prompt, **kwargs):
+        return await governed_call(self._model, estimate_tokens(prompt), lambda: self._runnable.ainvoke(prompt, **kwargs))
+
+    async def astream(self, prompt, **kwargs):
+        governor = rate_governor.for_model(self._model)
+        tokens = estimate_tokens(prompt)
+        retries = _Retries(self._model)
+        while True:
+            await governor.acquire(tokens)
+            started = False
+            try:
+                async for chunk in self._runnable.astream(prompt, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except (RateLimitError, *TRANSIENT_ERRORS) as e:
+                # a stream that already produced output can't be replayed
+                if started:
+                    raise
+                delay = retries.backoff(e, governor)
+            if delay:
+                await asyncio.sleep(delay)
@@ -0,0 +1,34 @@
+import tiktoken
+
+# ---------------------------------------------------------------------
+# TOKEN COUNTING
+# ---------------------------------------------------------------------
+# Shared tiktoken encoding for chunking and prompt budgets. Loaded lazily
+# because tiktoken fetches the BPE file on first use.
+
+DEFAULT_TOKEN_MODEL = "gpt-4o-mini"
+
+_encodings = {}
+
+
+def get_encoding(model: str = DEFAULT_TOKEN_MODEL):
+    encoding = _encodings.get(model)
+    if encoding is None:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        _encodings[model] = encoding
+    return encoding
+
+
+def count_tokens(text: str, model: str = DEFAULT_TOKEN_MODEL) -> int:
+    return len(get_encoding(model).encode(text or ""))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_TOKEN_MODEL) -> str:
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max(0, max_tokens)])
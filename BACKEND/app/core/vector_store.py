@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import chromadb
+from openai import AsyncOpenAI
+from app.core.concurrency import EmbeddingBatcher
+from app.core.llm_cassette import CASSETTE_ENABLED, aembed_with_cassette
+from app.core.rate_governor import governed_call
+from app.core.tokens import count_tokens
+from chromadb.utils import embedding_functions
+from dotenv import load_dotenv
+
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# -----------------------------
+# CHROMA SETUP
+# -----------------------------
+EMBEDDING_MODEL = "text-embedding-3-large"
+
+embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
+    api_key=OPENAI_API_KEY,
+    model_name=EMBEDDING_MODEL
+)
+
+_async_openai = None
+
+
+async def aembed_texts(texts: list) -> list:
+    """
+    One batched embeddings request for all `texts` (same model as the
+    collections' embedding_fn), without tying up a thread while waiting on
+    OpenAI. Goes through the cassette when record/replay is on.
+    """
+    if CASSETTE_ENABLED:
+        return await aembed_with_cassette(EMBEDDING_MODEL, texts, _aembed_openai)
+    return await _aembed_openai(texts)
+
+
+async def _aembed_openai(texts: list) -> list:
+    global _async_openai
+    if _async_openai is None:
+        _async_openai = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=0)
+
+    tokens = sum(count_tokens(text) for text in texts)
+    response = await governed_call(
+        EMBEDDING_MODEL, tokens,
+        lambda: _async_openai.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+    )
+    ordered = sorted(response.data, key=lambda item: item.index)
+    return [np.asarray(item.embedding, dtype=np.float32) for item in ordered]
+
+# Shared by all request paths so concurrent leads are embedded together
+embedding_batcher = EmbeddingBatcher(aembed_texts)
+
+# Get absolute path for ChromaDB
+# Fallback to current working directory if not specified in .env
+CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH")
+if CHROMA_DB_PATH:
+    CHROMA_PATH = os.path.abspath(CHROMA_DB_PATH)
+else:
+    # Try CWD first as it's most reliable for local development
+    CHROMA_PATH = os.path.join(os.getcwd(), "VECTOR_DB", "VECTOR_DB_updated", "chroma_store")
+
+# Final verification/fallback
+if not os.path.exists(CHROMA_PATH):
+    # Try one more fallback using __file__ if CWD fails
+    BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    FALLBACK_PATH = os.path.join(BACKEND_DIR, "VECTOR_DB", "VECTOR_DB_updated", "chroma_store")
+    if os.path.exists(FALLBACK_PATH):
+        CHROMA_PATH = FALLBACK_PATH
+
+client = chromadb.PersistentClient(path=CHROMA_PATH)
+
+# print("\n--- CHROMA DEBUG ---")
+# print("Path:", CHROMA_PATH)
+# print("Tenant:", client.tenant)
+# print("Database:", client.database)
+# print("Collections:", [c.name for c in client.list_collections()])
+# print("-------------------\n")
+
+COLLECTION_NAMES = {
+    "db_problems": "service_problems",
+    "db_capabilities": "service_capabilities",
+    "db_industries": "service_industries",
+    "db_technologies": "service_technologies",
+    "db_intent": "service_intent",
+    "db_identity": "service_identity",
+    "db_figures": "service_figures",
+    "db_service_name": "service_name"
+}
+
+collections = {
+    key: client.get_collection(name, embedding_function=embedding_fn)
+    for key, name in COLLECTION_NAMES.items()
+}
+
+# -----------------------------
+# KB VERSION FINGERPRINT
+# -----------------------------
+def kb_fingerprint() -> str:
+    """
+    Cheap version marker for the on-disk KB. Every ingestion writes to
+    chroma.sqlite3, so its mtime + size change whenever the KB is re-ingested.
+    In-memory views of the KB (vector index, profile table) compare against
+    this to decide when to reload.
+    """
+    sqlite_path = os.path.join(CHROMA_PATH, "chroma.sqlite3")
+    try:
+        stat = os.stat(sqlite_path)
+    except OSError:
+        return "missing"
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.lead_routes import router as lead_router
@@ -5,10 +6,55 @@ from app.api.intelligence_route import router as intelligence_router
 from app.api.linkedin_routes import router as linkedin_router
 from app.api.website_extract_routes import router as website_router
 from app.api.health import router as health_router
+from app.api.job_routes import router as job_router
+from app.core.config import VECTOR_BACKEND, INDEX_VERIFY_ON_STARTUP
+from app.core.executor import blocking_executor, run_blocking
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.llm_clients import llm_clients
+from app.core.indexes import index_manager
+import app.core.index_specs  # noqa: F401  registers the indexes + hot queries
+from app.services.service_vector_index import service_index
+from app.services.service_profile_cache import service_profiles
+from app.services.job_queue import job_workers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the in-process KB views so the first request doesn't pay for them
+    # Keep-alive pools + prebuilt structured-output runnables for every service
+    llm_clients.start()
+    if VECTOR_BACKEND == "numpy":
+        try:
+            await run_blocking(service_index.load)
+        except Exception as e:
+            print(f"Vector index warm-up failed, Chroma will be used: {e}")
+    try:
+        await run_blocking(service_profiles.build)
+    except Exception as e:
+        print(f"Service profile cache warm-up failed: {e}")
+    # Indexes declared by the routes/services (app.core.indexes)
+    try:
+        await index_manager.ensure()
+        if INDEX_VERIFY_ON_STARTUP:
+            for entry in await index_manager.verify_query_plans():
+                if entry["collscan"]:
+                    print(f"[INDEXES] WARNING: {entry['name']} plans a COLLSCAN {entry['stages']}")
+    except Exception as e:
+        print(f"Index bootstrap failed: {e}")
+    try:
+        await job_workers.start()
+    except Exception as e:
+        print(f"Job workers failed to start: {e}")
+    yield
+    await job_workers.stop()
+    await llm_clients.aclose()
+    blocking_executor.shutdown()
+
 
 # Add the 'title' parameter here
 app = FastAPI(
-    title="INT Business Central"
+    title="INT Business Central",
+    lifespan=lifespan
 )
 app.add_middleware(
     CORSMiddleware,
@@ -20,10 +66,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # lets the browser read the pagination cursor
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(health_router,tags=["Health"])
 app.include_router(lead_router, tags=["Leads"])
 app.include_router(intelligence_router, tags=["Intelligence"])
+app.include_router(job_router, tags=["Jobs"])
 app.include_router(linkedin_router, tags=["LinkedIn"])
 app.include_router(website_router,tags=["Website"])
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+class BatchAlignmentRequest(BaseModel):
+    lead_ids: List[str] = Field(..., min_length=1, description="Leads to run service alignment for")
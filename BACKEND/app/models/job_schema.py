@@ -0,0 +1,6 @@
+from pydantic import BaseModel, Field
+from typing import Literal
+
+class JobSubmit(BaseModel):
+    kind: Literal["service_alignment", "validate_profile"]
+    lead_id: str = Field(..., description="Lead the job runs for")
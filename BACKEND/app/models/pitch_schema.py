@@ -2,6 +2,12 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
+EXCERPT_CHARS = 200
+
+def pitch_excerpt(content: str) -> str:
+    """List-view preview, stored with the pitch when it is saved."""
+    return content[:EXCERPT_CHARS] + "..." if len(content) > EXCERPT_CHARS else content
+
 class PitchConfig(BaseModel):
     audience: str
     tone: str
@@ -23,6 +29,7 @@ class PitchDB(BaseModel):
     company_name: str
     industry: str
     content: str
+    excerpt: str = ""
     config: Dict[str, Any]
     services: List[str]
     generated_by: str = "Sarah Johnson"
@@ -0,0 +1,273 @@
+import asyncio
+import os
+import socket
+import traceback
+from datetime import datetime, timezone, timedelta
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import JOB_WORKERS, JOB_POLL_INTERVAL_S, JOB_LEASE_S, JOB_MAX_ATTEMPTS, JOB_TIMEOUTS
+from app.core.database import get_db
+from app.core.metrics import incr, observe, register_gauge
+from app.core.rate_governor import llm_lane
+from app.services.lead_intelligence import generate_service_alignment
+from app.services.lead_linkedin_entry import validate_lead_linkedin_profile
+
+# ---------------------------------------------------------------------
+# BACKGROUND JOB QUEUE (Mongo-backed)
+# ---------------------------------------------------------------------
+# Long-running intelligence work (service alignment, LinkedIn validation)
+# is submitted as a job and picked up by a fixed pool of async workers, so
+# HTTP requests return immediately and the pool size sets throughput.
+#
+# Job lifecycle:  queued -> running -> succeeded | failed
+#
+# A worker claims a job atomically and holds a lease on it that it keeps
+# renewing while the job runs. If the process dies, the lease expires and
+# the reaper puts the job back in the queue (or fails it once it has used
+# JOB_MAX_ATTEMPTS attempts).
+
+JOB_HANDLERS = {
+    "service_alignment": lambda payload: generate_service_alignment(payload["lead_id"]),
+    "validate_profile": lambda payload: validate_lead_linkedin_profile(payload["lead_id"]),
+}
+
+ACTIVE_STATUSES = ["queued", "running"]
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _dedupe_key(kind: str, payload: dict) -> str:
+    return f"{kind}:{payload.get('lead_id', '')}"
+
+
+def serialize_job(job: dict, include_result: bool = False) -> dict:
+    data = {
+        "job_id": str(job["_id"]),
+        "kind": job["kind"],
+        "payload": job.get("payload", {}),
+        "status": job["status"],
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+    if include_result:
+        data["result"] = job.get("result")
+    return data
+
+
+async def submit_job(kind: str, payload: dict) -> dict:
+    """
+    Queues a job and returns it. If the same job (kind + lead) is already
+    queued or running, that job is returned instead so client retries
+    don't duplicate the work.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    db = get_db()
+    dedupe_key = _dedupe_key(kind, payload)
+    for _ in range(3):
+        existing = await db.jobs.find_one({"active_key": dedupe_key})
+        if existing:
+            incr("jobs.deduplicated")
+            return existing
+
+        job = {
+            "kind": kind,
+            "payload": payload,
+            "dedupe_key": dedupe_key,
+            "active_key": dedupe_key,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": JOB_MAX_ATTEMPTS,
+            "created_at": _now(),
+        }
+        try:
+            result = await db.jobs.insert_one(job)
+        except DuplicateKeyError:
+            # a concurrent submit won the race; return its job (or retry if it already finished)
+            continue
+        job["_id"] = result.inserted_id
+        incr("jobs.submitted")
+        return job
+    raise RuntimeError(f"Could not submit {dedupe_key}: active job keeps changing")
+
+
+async def get_job(job_id: str):
+    if not ObjectId.is_valid(job_id):
+        return None
+    db = get_db()
+    return await db.jobs.find_one({"_id": ObjectId(job_id)})
+
+
+async def recover_expired_jobs() -> int:
+    """
+    Re-queues running jobs whose lease has expired (their worker crashed or
+    the app was restarted mid-job). Jobs out of attempts are failed.
+    """
+    db = get_db()
+    now = _now()
+    expired = {"status": "running", "lease_until": {"$lt": now}}
+
+    failed = await db.jobs.update_many(
+        {**expired, "$expr": {"$gte": ["$attempts", "$max_attempts"]}},
+        {"$set": {"status": "failed", "error": "Lease expired (worker crashed)", "finished_at": now},
+         "$unset": {"worker_id": "", "lease_until": "", "active_key": ""}}
+    )
+    requeued = await db.jobs.update_many(
+        expired,
+        {"$set": {"status": "queued"}, "$unset": {"worker_id": "", "lease_until": ""}}
+    )
+
+    recovered = failed.modified_count + requeued.modified_count
+    if recovered:
+        incr("jobs.recovered", recovered)
+        print(f"[JOBS] recovered {requeued.modified_count} expired job(s), failed {failed.modified_count}")
+    return recovered
+
+
+class JobWorkerPool:
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self.busy = 0
+        self._tasks = []
+        self._stopping = asyncio.Event()
+        self._host = f"{socket.gethostname()}:{os.getpid()}"
+
+    async def start(self):
+        await recover_expired_jobs()
+        self._stopping.clear()
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(f"{self._host}:{i}"))
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._reaper_loop()))
+        print(f"[JOBS] started {self.workers} worker(s)")
+
+    async def stop(self):
+        # Running jobs are cancelled; their leases expire and they are
+        # picked up again on the next start.
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _sleep(self, seconds: float):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _claim(self, worker_id: str):
+        db = get_db()
+        now = _now()
+        return await db.jobs.find_one_and_update(
+            {"status": "queued"},
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_until": now + timedelta(seconds=JOB_LEASE_S),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _renew_lease(self, job_id, worker_id: str):
+        db = get_db()
+        while True:
+            await asyncio.sleep(JOB_LEASE_S / 3)
+            try:
+                await db.jobs.update_one(
+                    {"_id": job_id, "worker_id": worker_id, "status": "running"},
+                    {"$set": {"lease_until": _now() + timedelta(seconds=JOB_LEASE_S)}}
+                )
+            except Exception as e:
+                # keep beating: a lapsed lease gets the running job requeued and run twice
+                incr("jobs.lease_renew_errors")
+                print(f"[JOBS] lease renewal failed for job {job_id}: {e}")
+
+    async def _finish(self, job: dict, worker_id: str, update: dict):
+        # Only the worker holding the lease may settle the job
+        db = get_db()
+        unset = {"lease_until": "", "worker_id": ""}
+        if update["status"] != "queued":
+            update["finished_at"] = _now()
+            # no longer active: the same kind + lead can be submitted again
+            unset["active_key"] = ""
+        await db.jobs.update_one(
+            {"_id": job["_id"], "worker_id": worker_id},
+            {"$set": update, "$unset": unset}
+        )
+
+    async def _run_job(self, job: dict, worker_id: str):
+        kind = job["kind"]
+        timeout = JOB_TIMEOUTS.get(kind)
+        waited = job["started_at"].replace(tzinfo=timezone.utc) - job["created_at"].replace(tzinfo=timezone.utc)
+        observe("jobs.queue_wait_ms", waited.total_seconds() * 1000)
+
+        heartbeat = asyncio.create_task(self._renew_lease(job["_id"], worker_id))
+        started = asyncio.get_running_loop().time()
+        try:
+            with llm_lane("background"):
+                result = await asyncio.wait_for(JOB_HANDLERS[kind](job.get("payload", {})), timeout=timeout)
+            await self._finish(job, worker_id, {"status": "succeeded", "result": result, "error": None})
+            incr("jobs.succeeded")
+        except asyncio.TimeoutError:
+            await self._finish(job, worker_id, {"status": "failed", "error": f"Timed out after {timeout:.0f}s"})
+            incr("jobs.timed_out")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            traceback.print_exc()
+            if job.get("attempts", 1) < job.get("max_attempts", JOB_MAX_ATTEMPTS):
+                await self._finish(job, worker_id, {"status": "queued", "error": str(e)})
+                incr("jobs.retried")
+            else:
+                await self._finish(job, worker_id, {"status": "failed", "error": str(e)})
+                incr("jobs.failed")
+        finally:
+            heartbeat.cancel()
+            observe(f"jobs.{kind}_ms", (asyncio.get_running_loop().time() - started) * 1000)
+
+    async def _worker_loop(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim(worker_id)
+            except Exception as e:
+                print(f"[JOBS] claim failed: {e}")
+                job = None
+
+            if job is None:
+                await self._sleep(JOB_POLL_INTERVAL_S)
+                continue
+
+            self.busy += 1
+            try:
+                await self._run_job(job, worker_id)
+            finally:
+                self.busy -= 1
+
+    async def _reaper_loop(self):
+        while not self._stopping.is_set():
+            await self._sleep(JOB_LEASE_S / 2)
+            try:
+                await recover_expired_jobs()
+            except Exception as e:
+                print(f"[JOBS] recovery sweep failed: {e}")
+
+
+job_workers = JobWorkerPool()
+
+register_gauge("jobs.workers", lambda: job_workers.workers)
+register_gauge("jobs.workers_busy", lambda: job_workers.busy)
@@ -0,0 +1,106 @@
+import zlib
+from datetime import datetime, timezone
+from bson import Binary
+
+from app.core.metrics import incr, observe
+from app.services.summary_cache import text_sha256
+
+# ---------------------------------------------------------------------
+# LEAD DOCUMENT TEXT STORE
+# ---------------------------------------------------------------------
+# Extracted RFP / attachment text lives in `lead_documents`, zlib
+# compressed, one record per uploaded file (same _id as the entry in
+# leads.documents). The lead itself only keeps a lightweight reference:
+#
+#   {"_id", "original_name", "file_type", "uploaded_at",
+#    "text_sha256", "text_chars", "has_text"}
+#
+# so every find_one on a lead stays small. The text hashes are enough to
+# look up the summary cache; the text itself is only loaded when the
+# summarization stage actually has to run.
+#
+# Leads created before the split still carry `extracted_text` inline;
+# the helpers below read both shapes (migrate_lead_documents.py moves the
+# old ones over).
+
+COMPRESSION_LEVEL = 6
+
+def document_ref(doc_id, original_name: str, file_type: str, text: str) -> dict:
+    """The entry kept in leads.documents for an uploaded file."""
+    return {
+        "_id": doc_id,
+        "original_name": original_name,
+        "file_type": file_type,
+        "text_sha256": text_sha256(text),
+        "text_chars": len(text),
+        "has_text": bool(text.strip()),
+        "uploaded_at": datetime.now(timezone.utc)
+    }
+
+
+async def store_document_text(db, lead_id, doc_id, text: str):
+    raw = text.encode("utf-8")
+    compressed = zlib.compress(raw, COMPRESSION_LEVEL)
+    await db.lead_documents.replace_one(
+        {"_id": doc_id},
+        {
+            "_id": doc_id,
+            "lead_id": lead_id,
+            "encoding": "zlib",
+            "text": Binary(compressed),
+            "text_sha256": text_sha256(text),
+            "raw_bytes": len(raw),
+            "stored_bytes": len(compressed),
+            "created_at": datetime.now(timezone.utc)
+        },
+        upsert=True
+    )
+    observe("lead_documents.compression_ratio", len(raw) / max(len(compressed), 1))
+
+
+def _decode(record: dict) -> str:
+    return zlib.decompress(bytes(record["text"])).decode("utf-8")
+
+
+def _with_text(lead: dict) -> list:
+    """Document entries that have text, inline (legacy) or stored."""
+    if not lead.get("documents"):
+        raise ValueError("No documents attached to this lead")
+
+    docs = [
+        doc for doc in lead["documents"]
+        if (doc.get("extracted_text") or "").strip() or doc.get("has_text")
+    ]
+    if not docs:
+        raise ValueError("No extracted text found in lead document")
+    return docs
+
+
+def lead_text_hashes(lead: dict) -> list:
+    """sha256 of every document text, without loading the stored texts."""
+    return [
+        doc["text_sha256"] if "text_sha256" in doc else text_sha256(doc["extracted_text"])
+        for doc in _with_text(lead)
+    ]
+
+
+async def load_lead_texts(db, lead: dict) -> list:
+    """Extracted text of every attached document, in upload order."""
+    docs = _with_text(lead)
+    stored_ids = [doc["_id"] for doc in docs if "extracted_text" not in doc]
+
+    stored = {}
+    if stored_ids:
+        async for record in db.lead_documents.find({"_id": {"$in": stored_ids}}):
+            stored[record["_id"]] = _decode(record)
+        incr("lead_documents.loaded", len(stored))
+
+    texts = []
+    for doc in docs:
+        if "extracted_text" in doc:
+            texts.append(doc["extracted_text"])
+        elif doc["_id"] in stored:
+            texts.append(stored[doc["_id"]])
+        else:
+            raise ValueError(f"Text of document {doc['_id']} is missing from lead_documents")
+    return texts
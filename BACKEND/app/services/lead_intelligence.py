@@ -1,69 +1,34 @@
 from datetime import datetime, timezone
 from bson import ObjectId
-from collections import defaultdict
 from pypdf import PdfReader
-import chromadb
-from chromadb.utils import embedding_functions
 import traceback
 import os
 from docx import Document
 from dotenv import load_dotenv
 import asyncio
+import time
+import numpy as np
 
 
 # IMPORT FILES
 from app.core.database import get_db
-from app.services.pdf_summarizer import summarize_text
-from app.services.structured_service_result import infer_service_alignment
+from app.core.metrics import timed, observe
+from app.core.config import VECTOR_BACKEND, ALIGNMENT_INFERENCE_MODE
+from app.core.executor import run_blocking
+from app.core.vector_store import embedding_batcher, collections
+from app.services.pdf_summarizer import asummarize_documents
+from app.services.structured_service_result import infer_service_alignment, infer_service_alignments_batched
+from langchain_core.callbacks import get_usage_metadata_callback
+from app.services.service_vector_index import service_index
+from app.services.service_profile_cache import service_profiles
+from app.services.score_fusion import rank_services
+from app.services.prompt_budget import build_service_context
+from app.services.lead_documents import lead_text_hashes, load_lead_texts
+from app.services.summary_cache import combine_text_hashes, summary_cache_key, load_cached_summary, store_cached_summary
 
 
 
 load_dotenv()
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# -----------------------------
-# CHROMA SETUP
-# -----------------------------
-embedding_fn = embedding_functions.OpenAIEmbeddingFunction(
-    api_key=OPENAI_API_KEY,
-    model_name="text-embedding-3-large"
-)
-
-# Get absolute path for ChromaDB
-# Fallback to current working directory if not specified in .env
-CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH")
-if CHROMA_DB_PATH:
-    CHROMA_PATH = os.path.abspath(CHROMA_DB_PATH)
-else:
-    # Try CWD first as it's most reliable for local development
-    CHROMA_PATH = os.path.join(os.getcwd(), "VECTOR_DB", "VECTOR_DB_updated", "chroma_store")
-
-# Final verification/fallback
-if not os.path.exists(CHROMA_PATH):
-    # Try one more fallback using __file__ if CWD fails
-    BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    FALLBACK_PATH = os.path.join(BACKEND_DIR, "VECTOR_DB", "VECTOR_DB_updated", "chroma_store")
-    if os.path.exists(FALLBACK_PATH):
-        CHROMA_PATH = FALLBACK_PATH
-
-client = chromadb.PersistentClient(path=CHROMA_PATH)
-
-# print("\n--- CHROMA DEBUG ---")
-# print("Path:", CHROMA_PATH)
-# print("Tenant:", client.tenant)
-# print("Database:", client.database)
-# print("Collections:", [c.name for c in client.list_collections()])
-# print("-------------------\n")
-
-collections = {
-    "db_problems": client.get_collection("service_problems", embedding_function=embedding_fn),
-    "db_capabilities": client.get_collection("service_capabilities", embedding_function=embedding_fn),
-    "db_industries": client.get_collection("service_industries", embedding_function=embedding_fn),
-    "db_technologies": client.get_collection("service_technologies", embedding_function=embedding_fn),
-    "db_intent": client.get_collection("service_intent", embedding_function=embedding_fn),
-    "db_identity": client.get_collection("service_identity", embedding_function=embedding_fn),
-    "db_figures": client.get_collection("service_figures", embedding_function=embedding_fn),
-    "db_service_name": client.get_collection("service_name", embedding_function=embedding_fn)
-}
 # -----------------------------
 # MONGO FETCH
 # -----------------------------
@@ -87,211 +52,298 @@ def normalize_to_string(value) -> str:
         return value.strip()
     return ""
 
+# field name ---> collection name
+FIELD_COLLECTION_MAP = {
+    "technologies": "db_technologies",
+    "capabilities": "db_capabilities",
+    "intent": "db_intent",
+    "identity": "db_identity",
+    "industry": "db_industries",   # singular on left, plural only in DB name
+    "problems": "db_problems"
+}
+
 # -----------------------------
-# RUN VECTOR MATCHING
+# BATCHED FIELD EMBEDDING
 # -----------------------------
-def run_matching(lead):
-    print("\n--- RUN COSINE MATCHING (DATABASE MODE) ---")
-
-    if not lead.get("documents"):
-        raise ValueError("No documents attached to this lead")
-
-    # Get extracted text from the first document in database
-    raw_text = lead["documents"][0].get("extracted_text", "")
-
-    if not raw_text.strip():
-        raise ValueError("No extracted text found in lead document")
-
-    summary = summarize_text(raw_text)
-
-    if not summary:
-        raise ValueError("Summarization failed")
-
-    print("Structured summary keys:", summary.keys())
-    for key, val in summary.items():
-        print(f"\n[SUMMARY DEBUG] {key.upper()}:\n{val}\n")
-
-    # field name ---> collection name
-    field_collection_map = {
-        "technologies": "db_technologies",
-        "capabilities": "db_capabilities",
-        "intent": "db_intent",
-        "identity": "db_identity",
-        "industry": "db_industries",   # singular on left, plural only in DB name
-        "problems": "db_problems"
-    }
-
-    service_scores = defaultdict(list)
-
-    for field, collection_name in field_collection_map.items():
+def summary_field_texts(summary) -> dict:
+    field_texts = {}
+    for field in FIELD_COLLECTION_MAP:
         value = normalize_to_string(summary.get(field))  # fetching the summary key and convert into string
+        if value:
+            field_texts[field] = value
+    return field_texts
 
-        if not value:
-              continue
 
-        result = collections[collection_name].query(
-            query_texts=[value],
-            n_results=5,
-            include=["distances", "metadatas"]
-        )
+async def aembed_summary_fields(summary) -> dict:
+    field_texts = summary_field_texts(summary)
+    if not field_texts:
+        return {}
 
-        distances = result["distances"][0]
-        metas = result["metadatas"][0]
+    embeddings = await embedding_batcher.embed(list(field_texts.values()))
+    return dict(zip(field_texts.keys(), embeddings))
 
-        for d, m in zip(distances, metas):
-            service = m.get("service")
-            cosine_similarity = 1 - d
-            service_scores[service].append(cosine_similarity)
-
-    return service_scores, summary
-
-# -----------------------------
-# SAFE CHROMA TO SCORES
-# -----------------------------
-def chroma_to_scores(chroma_result):
-    scores = defaultdict(float)
-
-    distances = chroma_result.get("distances", [[]])[0]
-    metas = chroma_result.get("metadatas", [[]])[0]
-
-    for d, m in zip(distances, metas):
-        similarity = 1 - d
-        service = m.get("service", "UNKNOWN")
-        scores[service] += similarity
-
-    return scores
 
+def _use_vector_index() -> bool:
+    if VECTOR_BACKEND != "numpy":
+        return False
+    try:
+        service_index.refresh_if_stale()
+    except Exception as e:
+        print(f"Vector index unavailable, falling back to Chroma: {e}")
+        return False
+    return service_index.ready
 
-def merge_scores(*dicts):
-    merged = defaultdict(float)
-    for d in dicts:
-        for k, v in d.items():
-            merged[k] += v
-    return merged
 
+def build_similarity_matrix(field_embeddings: dict, n_results: int = 5):
+    """
+    Dense service x field cosine-similarity matrix for score fusion.
+    The vector index scores every service on every field; the Chroma
+    backend only knows each field's top-k, the rest stay NaN.
+    Returns (services, fields, matrix).
+    """
+    fields = list(field_embeddings.keys())
+    per_field = {}
+
+    if _use_vector_index():
+        for field, embedding in field_embeddings.items():
+            per_field[field] = service_index.score_all(FIELD_COLLECTION_MAP[field], embedding)
+    else:
+        for field, embedding in field_embeddings.items():
+            result = collections[FIELD_COLLECTION_MAP[field]].query(
+                query_embeddings=[embedding],
+                n_results=n_results,
+                include=["distances", "metadatas"]
+            )
+            hits = {}
+            for d, m in zip(result["distances"][0], result["metadatas"][0]):
+                service = m.get("service")
+                hits[service] = max(hits.get(service, float("-inf")), 1 - d)
+            per_field[field] = hits
+
+    services = sorted({service for hits in per_field.values() for service in hits if service})
+    row = {service: i for i, service in enumerate(services)}
+    matrix = np.full((len(services), len(fields)), np.nan, dtype=np.float32)
+
+    for j, field in enumerate(fields):
+        for service, similarity in per_field[field].items():
+            if service in row:
+                matrix[row[service], j] = similarity
+
+    return services, fields, matrix
 
 # -----------------------------
-# FINAL SCORING
+# RUN VECTOR MATCHING
 # -----------------------------
-def average_cosine_scores(service_scores):
-    averaged = {}
+async def aprepare_lead_vectors(texts: list, timings: dict = None, stats: dict = None):
+    timings = {} if timings is None else timings
 
-    for service, scores in service_scores.items():
-        if scores:
-            averaged[service] = round(100*(round(sum(scores) / len(scores), 4)))
+    with timed("alignment.summarize", timings):
+        summary = await asummarize_documents(texts, stats)
 
-    return dict(sorted(averaged.items(), key=lambda x: x[1], reverse=True))
+    if not summary:
+        raise ValueError("Summarization failed")
 
+    with timed("alignment.embed", timings):
+        field_embeddings = await aembed_summary_fields(summary)
 
-def fetch_service_profile(service_name: str):
-    profile = {}
-
-    mapping = {
-        "db_technologies": "technologies",
-        "db_capabilities": "capabilities",
-        "db_intent": "intent",
-        "db_identity": "identity",
-        "db_industries": "industry",
-        "db_problems": "problems",
-        "db_figures": "figures_context",
-        "db_service_name": "display_name"
-    }
+    return summary, field_embeddings
 
-    for db_key, logical_key in mapping.items():
-        collection = collections[db_key]
-        result = collection.get(where={"service": service_name}, include=["documents"])
-        # Join all matching document chunks into one string for better context
-        profile[logical_key] = "\n".join(result["documents"]) if result["documents"] else ""
 
-    return profile
+def fetch_service_profile(service_name: str):
+    # Served from the in-memory profile table (see service_profile_cache)
+    return service_profiles.get(service_name)
 
 # ---------------------------------------
 # MAIN ENTRY POINT: SERVICE ALIGNMENT
 # ---------------------------------------
-async def generate_service_alignment(lead_id: str):
+async def _infer_indexed(index: int, summary, service_data: dict):
+    # as_completed loses task order, so each result carries its rank slot
+    try:
+        return index, await infer_service_alignment(summary, service_data)
+    except Exception as e:
+        return index, e
+
+
+def _matched_service_entry(service: str, score, profile: dict, inference) -> dict:
+    if isinstance(inference, Exception):
+        reasoning = f"Matched based on {score}% similarity. Detailed analysis delayed."
+        experience, features, figures = [], [], ""
+    else:
+        reasoning = inference.get('reasoning', "")
+        experience = inference.get('relevant_experience', [])
+        features = inference.get('key_features', [])
+        figures = inference.get('service_figures', "")
+
+    return {
+        "service": service,
+        "display_name": profile.get("display_name", service),
+        "cosine_similarity": score,
+        "reasoning": reasoning,
+        "relevant_experience": experience,
+        "key_features": features,
+        "service_figures": figures
+    }
+
+
+async def iter_service_alignment(lead_id: str, lead: dict = None):
     """
-    Handles the core service alignment logic: document processing, 
-    vector matching, and service inference.
+    Runs the service alignment pipeline and yields (event, data) pairs as
+    each stage finishes:
+        summary   -> extraction summary is ready
+        ranking   -> vector ranking of the top services
+        service   -> one per matched service, in completion order
+        done      -> final score + matched services (rank order), persisted
     """
     try:
         print("\n==== SERVICE ALIGNMENT START ====")
+        timings = {}
+        start = time.perf_counter()
 
-        lead = await get_lead(lead_id)
+        if lead is None:
+            with timed("alignment.fetch_lead", timings):
+                lead = await get_lead(lead_id)
         
-        # Run vector matching (includes doc extraction and summarization)
-        loop = asyncio.get_running_loop()
-        from concurrent.futures import ThreadPoolExecutor
-        with ThreadPoolExecutor() as executor:
-            matching_results = await loop.run_in_executor(executor, run_matching, lead)
-
-        service_scores, summary = matching_results
-        ranked_scores = average_cosine_scores(service_scores)
+        # Summary + field embeddings are reused when the document is unchanged;
+        # the stored hashes are enough to check, the text is loaded on a miss
+        text_hash = combine_text_hashes(lead_text_hashes(lead))
+        cache_key = summary_cache_key(text_hash)
+        cached = await load_cached_summary(cache_key)
+
+        # Run vector matching (includes summarization on a cache miss)
+        summary_stats = {"cache_hit": bool(cached)}
+        if cached:
+            print("[SUMMARY CACHE] hit, skipping summarization and embedding")
+            summary, field_embeddings = cached
+        else:
+            with timed("alignment.load_documents", timings):
+                texts = await load_lead_texts(get_db(), lead)
+            summary, field_embeddings = await aprepare_lead_vectors(texts, timings, summary_stats)
+            try:
+                await store_cached_summary(cache_key, text_hash, summary, field_embeddings)
+            except Exception as e:
+                print(f"Summary cache write failed: {e}")
+
+        yield "summary", {"extraction_summary": summary, "summary_stats": summary_stats}
+
+        # Chroma / index reloads are blocking, so they go through the shared pool
+        with timed("alignment.vector_query", timings):
+            services, fields, similarity_matrix = await run_blocking(
+                build_similarity_matrix, field_embeddings
+            )
+
+        with timed("alignment.rank", timings):
+            ranked_scores = rank_services(services, fields, similarity_matrix)
 
         # Service Inference
-        final = []
-        inference_tasks = []
+        services_data = []
         matched_results_metadata = []
 
+        profile_start = time.perf_counter()
+        # Rebuild off the event loop if the KB was re-ingested since the last build
+        await service_profiles.arefresh_if_stale()
         for service, score in list(ranked_scores.items())[:5]:
             profile = fetch_service_profile(service)
-            service_data = {
-                "service": service,
-                "technologies": profile.get("technologies", ""),
-                "capabilities": profile.get("capabilities", ""),
-                "intent": profile.get("intent", ""),
-                "problems": profile.get("problems", ""),
-                "industry": profile.get("industry", ""),
-                "identity": profile.get("identity", ""),
-                "figures_context": profile.get("figures_context", "")
-            }
-            inference_tasks.append(infer_service_alignment(summary, service_data))
+            # KB text trimmed to the prompt budgets, most relevant chunks first
+            service_data = build_service_context(service, field_embeddings, summary)
+            services_data.append(service_data)
             matched_results_metadata.append({"service": service, "score": score, "profile": profile})
 
-        inference_results = await asyncio.gather(*inference_tasks, return_exceptions=True)
+        timings["profile_fetch"] = round((time.perf_counter() - profile_start) * 1000, 1)
+        observe("alignment.profile_fetch", timings["profile_fetch"])
 
-        for meta, inference in zip(matched_results_metadata, inference_results):
-            service = meta["service"]
-            score = meta["score"]
-            profile = meta["profile"]
-
-            if isinstance(inference, Exception):
-                reasoning = f"Matched based on {score}% similarity. Detailed analysis delayed."
-                experience, features, figures = [], [], ""
+        yield "ranking", {
+            "services": [
+                {
+                    "service": meta["service"],
+                    "display_name": meta["profile"].get("display_name", meta["service"]),
+                    "cosine_similarity": meta["score"]
+                }
+                for meta in matched_results_metadata
+            ]
+        }
+
+        final = [None] * len(services_data)
+        inference_start = time.perf_counter()
+        with get_usage_metadata_callback() as usage:
+            if ALIGNMENT_INFERENCE_MODE == "batched":
+                # One structured call for all services (per-service fallback inside)
+                inferences = await infer_service_alignments_batched(summary, services_data)
+                for index, inference in enumerate(inferences):
+                    meta = matched_results_metadata[index]
+                    final[index] = _matched_service_entry(meta["service"], meta["score"], meta["profile"], inference)
+                    yield "service", {"rank": index + 1, **final[index]}
             else:
-                reasoning = inference.get('reasoning', "")
-                experience = inference.get('relevant_experience', [])
-                features = inference.get('key_features', [])
-                figures = inference.get('service_figures', "")
-
-            final.append({
-                "service": service,
-                "display_name": profile.get("display_name", service),
-                "cosine_similarity": score,
-                "reasoning": reasoning,
-                "relevant_experience": experience,
-                "key_features": features,
-                "service_figures": figures
-            })
+                # Each inference is streamed as soon as it lands instead of
+                # waiting for the slowest of the five
+                inference_tasks = [
+                    asyncio.create_task(_infer_indexed(index, summary, service_data))
+                    for index, service_data in enumerate(services_data)
+                ]
+                try:
+                    for finished in asyncio.as_completed(inference_tasks):
+                        index, inference = await finished
+                        meta = matched_results_metadata[index]
+                        final[index] = _matched_service_entry(meta["service"], meta["score"], meta["profile"], inference)
+                        yield "service", {"rank": index + 1, **final[index]}
+                finally:
+                    # consumer went away mid-stream -> don't leave LLM calls running
+                    for task in inference_tasks:
+                        task.cancel()
+
+        timings["inference"] = round((time.perf_counter() - inference_start) * 1000, 1)
+        inference_tokens = {
+            key: sum(model_usage.get(key, 0) for model_usage in usage.usage_metadata.values())
+            for key in ("input_tokens", "output_tokens", "total_tokens")
+        }
+        observe("alignment.inference", timings["inference"])
+        observe(f"alignment.inference_{ALIGNMENT_INFERENCE_MODE}_ms", timings["inference"])
+        observe(f"alignment.inference_{ALIGNMENT_INFERENCE_MODE}_tokens", inference_tokens["total_tokens"])
+        print(f"[INFERENCE {ALIGNMENT_INFERENCE_MODE}] {timings['inference']} ms, tokens {inference_tokens}")
 
         # Calculate alignment score
         alignment_score = float(list(ranked_scores.values())[0]) if ranked_scores else 0.0
         
         # Save to DB (only alignment portion)
         db = get_db()
-        await db.leads.update_one(
-            {"_id": ObjectId(lead_id)},
-            {
-                "$set": {
-                    "score": alignment_score,
-                    "matched_services": final,
-                    "extraction_summary": summary,
-                    "updated_at": datetime.now(timezone.utc)
+        with timed("alignment.persist", timings):
+            await db.leads.update_one(
+                {"_id": ObjectId(lead_id)},
+                {
+                    "$set": {
+                        "score": alignment_score,
+                        "matched_services": final,
+                        "extraction_summary": summary,
+                        "summary_stats": summary_stats,
+                        "inference_stats": {"mode": ALIGNMENT_INFERENCE_MODE, "ms": timings["inference"], **inference_tokens},
+                        "updated_at": datetime.now(timezone.utc)
+                    }
                 }
-            }
-        )
+            )
+
+        timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+        observe("alignment.total", timings["total"])
+        print(f"[ALIGNMENT TIMINGS ms] {timings}")
 
-        return final
+        yield "done", {
+            "score": alignment_score,
+            "matched_services": final,
+            "timings": timings,
+            "inference_tokens": inference_tokens
+        }
 
     except Exception as e:
         traceback.print_exc()
         raise e
+
+
+async def generate_service_alignment(lead_id: str, lead: dict = None):
+    """
+    Handles the core service alignment logic: document processing, 
+    vector matching, and service inference.
+    `lead` can be passed when the caller already loaded it (batch mode).
+    """
+    final = []
+    async for event, data in iter_service_alignment(lead_id, lead):
+        if event == "done":
+            final = data["matched_services"]
+    return final
@@ -1,9 +1,9 @@
 import os
 from typing import Dict, Any, List
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
+from app.core.llm_clients import llm_clients
 
 load_dotenv()
 
@@ -16,6 +16,8 @@ class ProfileValidation(BaseModel):
     designation: str = Field(description="The primary designation found.")
     is_decision_maker: bool = Field(description="Whether the person is likely a decision maker.")
 
+llm_clients.declare(ProfileValidation, "gpt-4o-mini", 0)
+
 async def validate_lead_profile(linkedin_data: Dict[str, Any], lead_context: Dict[str, Any]) -> ProfileValidation:
     """
     Analyzes LinkedIn data against lead requirements to score the profile.
@@ -24,13 +26,7 @@ async def validate_lead_profile(linkedin_data: Dict[str, Any], lead_context: Dic
     if not api_key:
         raise ValueError("OPENAI_API_KEY not found")
 
-    model = ChatOpenAI(
-        api_key=api_key,
-        model="gpt-4o-mini",
-        temperature=0
-    )
-    
-    structured_llm = model.with_structured_output(ProfileValidation)
+    structured_llm = llm_clients.structured(ProfileValidation, "gpt-4o-mini", 0)
 
     prompt = PromptTemplate(
         template="""
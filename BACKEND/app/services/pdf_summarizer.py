@@ -1,20 +1,25 @@
 import os
+import time
+import asyncio
 from dotenv import load_dotenv
 from typing import List, Dict
 from typing import TypedDict,Annotated,Optional
 from langchain_core.prompts import PromptTemplate
 import certifi
-from langchain_openai import ChatOpenAI
+from app.core.config import SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP, SUMMARY_MAP_CONCURRENCY
+from app.core.metrics import observe
+from app.core.concurrency import llm_slot
+from app.core.llm_clients import llm_clients
+from app.core.tokens import get_encoding, count_tokens
 
 # ========================= ENV =========================
 os.environ["SSL_CERT_FILE"] = certifi.where()
 load_dotenv()
 
-model = ChatOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    model="gpt-4o-mini",
-    temperature=0
-)
+SUMMARY_MODEL = "gpt-4o-mini"
+# Bump whenever the summarization prompt or schema changes so cached
+# summaries produced by the old prompt are no longer reused.
+SUMMARY_PROMPT_VERSION = "v2"
 
 # ====================== LEAD PDF EXTRACTION ===============================================
 
@@ -36,10 +41,13 @@ class Summarization(TypedDict):
 
 
 
-structured_model = model.with_structured_output(Summarization)
+llm_clients.declare(Summarization, SUMMARY_MODEL, 0)
 
-def summarize_text(text: str) -> Summarization:
-    prompt = PromptTemplate(
+
+def _structured_model():
+    return llm_clients.structured(Summarization, SUMMARY_MODEL, 0)
+
+SUMMARY_PROMPT = PromptTemplate(
     template =
       """
     You are a senior enterprise business analyst and solution architect.
@@ -88,7 +96,152 @@ def summarize_text(text: str) -> Summarization:
     ,input_variables = ["text"])
 
 
-    response = structured_model.invoke(prompt.format(text=text))
+async def asummarize_text(text: str) -> Summarization:
+    """One structured extraction call; async so the event loop is never blocked."""
+    async with llm_slot():
+        response = await _structured_model().ainvoke(SUMMARY_PROMPT.format(text=text))
     return response
 
 
+# ====================== MULTI-DOCUMENT MAP-REDUCE ==========================================
+
+def chunk_text_by_tokens(text: str, max_tokens: int = SUMMARY_CHUNK_TOKENS, overlap: int = SUMMARY_CHUNK_OVERLAP) -> List[str]:
+    encoding = get_encoding(SUMMARY_MODEL)
+    tokens = encoding.encode(text or "")
+    if len(tokens) <= max_tokens:
+        return [text] if text.strip() else []
+
+    step = max(1, max_tokens - overlap)
+    chunks = []
+    for start in range(0, len(tokens), step):
+        chunks.append(encoding.decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
+
+
+DOCUMENT_SEPARATOR = "\n\n-----\n\n"
+
+
+def pack_documents(texts: List[str], max_tokens: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+    """
+    Map-step inputs for all documents of a lead, in order: documents that
+    fit are packed together up to max_tokens, longer ones are chunked on
+    their own.
+    """
+    separator_tokens = count_tokens(DOCUMENT_SEPARATOR)
+    chunks, pack, pack_tokens = [], [], 0
+    for text in texts:
+        if not (text or "").strip():
+            continue
+        tokens = count_tokens(text)
+        if tokens > max_tokens:
+            if pack:
+                chunks.append(DOCUMENT_SEPARATOR.join(pack))
+                pack, pack_tokens = [], 0
+            chunks.extend(chunk_text_by_tokens(text, max_tokens))
+            continue
+        if pack and pack_tokens + separator_tokens + tokens > max_tokens:
+            chunks.append(DOCUMENT_SEPARATOR.join(pack))
+            pack, pack_tokens = [], 0
+        pack_tokens += tokens + (separator_tokens if pack else 0)
+        pack.append(text)
+    if pack:
+        chunks.append(DOCUMENT_SEPARATOR.join(pack))
+    return chunks
+
+
+REDUCE_PROMPT = PromptTemplate(
+    template =
+      """
+    You are a senior enterprise business analyst and solution architect.
+
+    The client's requirement documents were too long to read at once, so each part
+    was analysed separately. Below are the partial extractions, one per part.
+
+    Partial extractions:
+    {partials}
+
+    Merge them into ONE structured extraction covering all parts:
+    - Combine and de-duplicate information; keep every distinct requirement
+    - Use ONLY information present in the partial extractions
+    - Each field should be detailed but concise (2–4 sentences)
+    - Maintain factual, neutral, business language
+
+    Fields: identity, capabilities, technologies, intent, problems, industry.
+    DO NOT rename keys.
+    DO NOT add extra keys"""
+    ,input_variables = ["partials"])
+
+
+def _render_partials(partials: List[Dict]) -> str:
+    blocks = []
+    for i, partial in enumerate(partials, 1):
+        fields = "\n".join(f"  {key}: {value}" for key, value in partial.items() if value)
+        blocks.append(f"[Part {i}]\n{fields}")
+    return "\n\n".join(blocks)
+
+
+async def _reduce_partials(partials: List[Dict]) -> Summarization:
+    # chunks with nothing extractable add nothing to merge
+    partials = [p for p in partials if p and any(p.values())]
+    if not partials:
+        return {}
+    if len(partials) == 1:
+        return partials[0]
+
+    rendered = _render_partials(partials)
+
+    # Very large leads: merge in groups first so the reduce prompt stays in budget
+    if len(partials) > 2 and count_tokens(rendered) > SUMMARY_CHUNK_TOKENS:
+        mid = len(partials) // 2
+        left, right = await asyncio.gather(
+            _reduce_partials(partials[:mid]), _reduce_partials(partials[mid:])
+        )
+        partials = [left, right]
+        rendered = _render_partials(partials)
+
+    async with llm_slot():
+        return await _structured_model().ainvoke(REDUCE_PROMPT.format(partials=rendered))
+
+
+async def asummarize_documents(texts: List[str], stats: Dict = None) -> Summarization:
+    """
+    Summarizes ALL lead documents into one Summarization.
+    Map: token-bounded chunks (small documents packed together) summarized
+    concurrently (bounded by a semaphore).
+    Reduce: partial extractions merged into the six-field schema.
+    """
+    stats = {} if stats is None else stats
+    start = time.perf_counter()
+
+    chunks = pack_documents(texts)
+    if not chunks:
+        raise ValueError("No extracted text found in lead documents")
+
+    stats["documents"] = len(texts)
+    stats["chunks"] = len(chunks)
+    stats["input_tokens"] = sum(count_tokens(chunk) for chunk in chunks)
+
+    if len(chunks) == 1:
+        summary = await asummarize_text(chunks[0])
+    else:
+        semaphore = asyncio.Semaphore(SUMMARY_MAP_CONCURRENCY)
+
+        async def _map(chunk):
+            async with semaphore:
+                return await asummarize_text(chunk)
+
+        map_start = time.perf_counter()
+        partials = await asyncio.gather(*[_map(chunk) for chunk in chunks])
+        stats["map_ms"] = round((time.perf_counter() - map_start) * 1000, 1)
+
+        reduce_start = time.perf_counter()
+        summary = await _reduce_partials(partials)
+        stats["reduce_ms"] = round((time.perf_counter() - reduce_start) * 1000, 1)
+
+    stats["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    observe("summarize.input_tokens", stats["input_tokens"])
+    observe("summarize.chunks", stats["chunks"])
+    observe("summarize.total_ms", stats["total_ms"])
+    return summary
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+from datetime import datetime, timezone, timedelta
+from bson import ObjectId
+
+from app.core.config import PITCH_DRAFTS_ENABLED, PITCH_DRAFT_TOP_N, PITCH_DRAFT_TTL_S, PITCH_DRAFT_WAIT_S
+from app.core.database import get_db
+from app.core.llm_clients import llm_clients
+from app.core.metrics import incr, observe
+from app.core.rate_governor import llm_lane
+from app.models.pitch_schema import PitchConfig
+from app.services.pitch_generator import build_pitch_prompt
+
+# ---------------------------------------------------------------------
+# SPECULATIVE PITCH DRAFTS
+# ---------------------------------------------------------------------
+# Right after alignment the user almost always asks for a pitch with the
+# default config (PitchConfigModal) for the top services. With
+# PITCH_DRAFTS_ENABLED, that pitch is generated in the background in the
+# lowest-priority LLM lane as soon as alignment is saved, and stored in
+# `pitch_drafts`. generate-pitch hands it out when the request matches.
+# Only the interactive single-lead alignment endpoints schedule drafts;
+# batch and job alignments don't, nobody is about to open their pitch.
+#
+# A draft is keyed by a hash of the lead context it was written from, so
+# any change to the lead (new summary, company, budget...) makes it stale.
+# Drafts also expire after PITCH_DRAFT_TTL_S (Mongo TTL index).
+
+# Mirrors the initial state of PitchConfigModal in the frontend
+DEFAULT_PITCH_CONFIG = PitchConfig(audience="c-level", tone="professional", length="detailed", focusAreas=["roi"])
+
+# lead_id -> (in-flight draft task, its services); one per lead, newest alignment wins
+_inflight = {}
+
+
+async def build_pitch_context(db, lead: dict):
+    """Returns (company_name, lead_context) used to prompt the pitch model."""
+    # Get company details for the pitch
+    company = await db.companies.find_one({"_id": lead["company_id"]})
+    company_name = company["name"] if company else lead.get("company_name", "Unknown")
+    company_size = company["size"] if company else "N/A"
+
+    # Aggregate full context for dynamic prompt
+    extraction = lead.get("extraction_summary", {})
+    biz_context = lead.get("business_context", {})
+
+    lead_context = {
+        "company_name": company_name,
+        "company_size": company_size,
+        "industry": lead.get("industry") or biz_context.get("industry", "Unknown"),
+        "pain_points": extraction.get("problems") or biz_context.get("pain_points_requirements_text", "No specific pain points reported"),
+        "business_identity": extraction.get("identity", "N/A"),
+        "business_intent": extraction.get("intent", "N/A"),
+        "tech_stack": extraction.get("technologies", "N/A"),
+        "budget": biz_context.get("estimated_budget", "Not specified"),
+        "timeline": biz_context.get("timeline", "Flexible")
+    }
+    return company_name, lead_context
+
+
+def context_hash(lead_context: dict) -> str:
+    raw = json.dumps(lead_context, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _config_key(config: PitchConfig) -> dict:
+    return {
+        "audience": config.audience,
+        "tone": config.tone,
+        "length": config.length,
+        "focusAreas": sorted(config.focusAreas)
+    }
+
+
+# ---------------------------------------------------------------------
+# GENERATION
+# ---------------------------------------------------------------------
+def schedule_pitch_draft(lead_id: str, matched_services: list):
+    """Starts a background draft for the lead's top services (no-op when disabled)."""
+    if not PITCH_DRAFTS_ENABLED or not matched_services:
+        return
+
+    previous, _ = _inflight.pop(lead_id, (None, None))
+    if previous is not None and not previous.done():
+        previous.cancel()
+
+    services = [entry["service"] for entry in matched_services[:PITCH_DRAFT_TOP_N]]
+    task = asyncio.get_running_loop().create_task(_generate_draft(lead_id, services))
+    _inflight[lead_id] = (task, services)
+    task.add_done_callback(
+        lambda t: _inflight.pop(lead_id, None) if _inflight.get(lead_id, (None,))[0] is t else None
+    )
+
+
+async def _generate_draft(lead_id: str, services: list):
+    db = get_db()
+    start = asyncio.get_running_loop().time()
+    try:
+        lead = await db.leads.find_one({"_id": ObjectId(lead_id)})
+        if not lead:
+            return
+        _, lead_context = await build_pitch_context(db, lead)
+
+        # Same model and prompt as generate_pitch_content, but a failure
+        # stores nothing instead of the static fallback pitch
+        with llm_lane("batch"):
+            model = llm_clients.chat("gpt-4o-mini", 0.3)
+            response = await model.ainvoke(build_pitch_prompt(lead_context, services, DEFAULT_PITCH_CONFIG))
+
+        now = datetime.now(timezone.utc)
+        await db.pitch_drafts.delete_many({"lead_id": lead_id})
+        await db.pitch_drafts.insert_one({
+            "lead_id": lead_id,
+            "context_hash": context_hash(lead_context),
+            "services": services,
+            # the alignment page selects services by their rank index
+            "service_ids": [str(i) for i in range(len(services))],
+            "config": _config_key(DEFAULT_PITCH_CONFIG),
+            "content": response.content.strip(),
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=PITCH_DRAFT_TTL_S)
+        })
+        incr("pitch_drafts.generated")
+        observe("pitch_drafts.generate_ms", (asyncio.get_running_loop().time() - start) * 1000)
+        print(f"[PITCH DRAFT] stored default pitch for lead {lead_id} ({', '.join(services)})")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        incr("pitch_drafts.failed")
+        print(f"Speculative pitch draft failed for lead {lead_id}: {e}")
+
+
+# ---------------------------------------------------------------------
+# LOOKUP
+# ---------------------------------------------------------------------
+async def take_pitch_draft(db, lead_id: str, lead_context: dict, selected_services: list, config: PitchConfig):
+    """
+    Returns the stored draft content if it was generated from the current
+    lead context for the same services and config, else None. A draft is
+    handed out once; stale drafts of the lead are dropped.
+    """
+    if not PITCH_DRAFTS_ENABLED:
+        return None
+
+    selected = sorted(selected_services)
+
+    # a matching draft that is still being written is worth a short wait;
+    # the batch lane can be starved, so don't wait for it indefinitely
+    task, services = _inflight.get(lead_id, (None, None))
+    if (
+        task is not None and not task.done()
+        and _config_key(config) == _config_key(DEFAULT_PITCH_CONFIG)
+        and selected in (sorted(services), [str(i) for i in range(len(services))])
+    ):
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout=PITCH_DRAFT_WAIT_S)
+        except asyncio.TimeoutError:
+            incr("pitch_drafts.wait_timeouts")
+        except Exception:
+            pass
+
+    current = context_hash(lead_context)
+    stale = await db.pitch_drafts.delete_many({"lead_id": lead_id, "context_hash": {"$ne": current}})
+    if stale.deleted_count:
+        incr("pitch_drafts.stale")
+
+    draft = await db.pitch_drafts.find_one_and_delete({
+        "lead_id": lead_id,
+        "context_hash": current,
+        "config": _config_key(config),
+        "expires_at": {"$gt": datetime.now(timezone.utc)},
+        "$or": [
+            {"services": {"$size": len(selected), "$all": selected}},
+            {"service_ids": {"$size": len(selected), "$all": selected}}
+        ]
+    })
+    if draft is None:
+        incr("pitch_drafts.misses")
+        return None
+
+    incr("pitch_drafts.hits")
+    return draft["content"]
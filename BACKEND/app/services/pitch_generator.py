@@ -1,50 +1,45 @@
 import os
-from typing import List, Dict, Any
+import re
+import time
+import asyncio
+from typing import List, Dict, Any, Annotated
+from typing_extensions import TypedDict
+from langchain_core.callbacks import get_usage_metadata_callback
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from app.models.lead_schema import LeadDB
 from app.models.pitch_schema import PitchConfig
+from app.core.llm_clients import llm_clients
+from app.core.llm_hedging import hedged
+from app.core.metrics import incr, observe
 
 load_dotenv()
 
-async def generate_pitch_content(lead: Dict[str, Any], selected_services: List[str], config: PitchConfig) -> str:
-    """
-    Generates a tailored enterprise proposal using OpenAI gpt-4o-mini.
-    Uses deep lead metadata and follows a strict professional structure.
-    """
-    
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return _generate_fallback_pitch(lead, selected_services, config)
-
-    audience_map = {
-        "c-level": "C-Level Executives (CEO, CTO, CFO). Focus on high-level strategic value, ROI, and long-term business impact.",
-        "technical": "Technical Decision Makers (VP Engineering, Tech Leads). Emphasize architecture, scalability, security, and technical integration details.",
-        "business": "Business Stakeholders (Product Managers, Operations). Balance operational efficiency, user experience, and market competitiveness."
-    }
-
-    tone_map = {
-        "professional": "Professional, authoritative, and value-driven. Use industry-standard terminology.",
-        "consultative": "Consultative and collaborative. Frame solutions as a partnership to solve specific challenges.",
-        "technical": "Highly technical and analytical. Focus on hard data, specifications, and implementation details."
-    }
-
-    length_instructions = {
-        "brief": "Keep the proposal concise (200-300 words). Focus only on the most critical value points.",
-        "standard": "Provide a balanced overview (300-500 words) with sufficient detail for each section.",
-        "detailed": "Provide a comprehensive, in-depth proposal (500-800 words) with detailed analysis and specific examples."
-    }
-
-    try:
-        model = ChatOpenAI(
-            api_key=api_key,
-            model="gpt-4o-mini",
-            temperature=0.3
-        )
-
-        prompt_template = PromptTemplate(
-            template="""
+llm_clients.declare(None, "gpt-4o-mini", 0.3)
+llm_clients.declare(None, "gpt-4o-mini", 0.4)
+
+AUDIENCE_MAP = {
+    "c-level": "C-Level Executives (CEO, CTO, CFO). Focus on high-level strategic value, ROI, and long-term business impact.",
+    "technical": "Technical Decision Makers (VP Engineering, Tech Leads). Emphasize architecture, scalability, security, and technical integration details.",
+    "business": "Business Stakeholders (Product Managers, Operations). Balance operational efficiency, user experience, and market competitiveness."
+}
+
+TONE_MAP = {
+    "professional": "Professional, authoritative, and value-driven. Use industry-standard terminology.",
+    "consultative": "Consultative and collaborative. Frame solutions as a partnership to solve specific challenges.",
+    "technical": "Highly technical and analytical. Focus on hard data, specifications, and implementation details."
+}
+
+LENGTH_INSTRUCTIONS = {
+    "brief": "Keep the proposal concise (200-300 words). Focus only on the most critical value points.",
+    "standard": "Provide a balanced overview (300-500 words) with sufficient detail for each section.",
+    "detailed": "Provide a comprehensive, in-depth proposal (500-800 words) with detailed analysis and specific examples."
+}
+
+def build_pitch_prompt(lead: Dict[str, Any], selected_services: List[str], config: PitchConfig) -> str:
+    """Renders the proposal prompt for a lead context + pitch config."""
+    prompt_template = PromptTemplate(
+        template="""
         Target Audience: {audience_desc}
         Tone: {tone_desc}
         Length Guidelines: {length_desc}
@@ -103,34 +98,50 @@ async def generate_pitch_content(lead: Dict[str, Any], selected_services: List[s
         # 7. CONCLUSION & NEXT STEPS
         [Call to action for {pitch_audience}]
         """,
-            input_variables=[
-                "company_name", "industry", "company_size", "pain_points", 
-                "business_identity", "business_intent", "selected_services", 
-                "tech_stack", "budget", "timeline", 
-                "audience_desc", "tone_desc", "length_desc", "focus_areas", 
-                "pitch_audience", "focus_areas_title"
-            ]
-        )
+        input_variables=[
+            "company_name", "industry", "company_size", "pain_points", 
+            "business_identity", "business_intent", "selected_services", 
+            "tech_stack", "budget", "timeline", 
+            "audience_desc", "tone_desc", "length_desc", "focus_areas", 
+            "pitch_audience", "focus_areas_title"
+        ]
+    )
+
+    prompt_text = prompt_template.format(
+        company_name=lead.get("company_name", "your company"),
+        industry=lead.get("industry", "your industry"),
+        company_size=lead.get("company_size", "N/A"),
+        pain_points=lead.get("pain_points", "N/A"),
+        business_identity=lead.get("business_identity", "N/A"),
+        business_intent=lead.get("business_intent", "N/A"),
+        selected_services=", ".join(selected_services),
+        tech_stack=lead.get("tech_stack", "N/A"),
+        budget=lead.get("budget", "Not specified"),
+        timeline=lead.get("timeline", "Flexible"),
+        audience_desc=AUDIENCE_MAP.get(config.audience, config.audience), # mapping from frontend to the mapping in the backend
+        tone_desc=TONE_MAP.get(config.tone, config.tone),
+        length_desc=LENGTH_INSTRUCTIONS.get(config.length, "Standard length"),
+        focus_areas=", ".join(config.focusAreas),
+        pitch_audience=config.audience.capitalize(),
+        focus_areas_title=" & ".join([fa.replace('_', ' ').title() for fa in config.focusAreas])
+    )
+
+    return prompt_text
 
-        prompt_text = prompt_template.format(
-            company_name=lead.get("company_name", "your company"),
-            industry=lead.get("industry", "your industry"),
-            company_size=lead.get("company_size", "N/A"),
-            pain_points=lead.get("pain_points", "N/A"),
-            business_identity=lead.get("business_identity", "N/A"),
-            business_intent=lead.get("business_intent", "N/A"),
-            selected_services=", ".join(selected_services),
-            tech_stack=lead.get("tech_stack", "N/A"),
-            budget=lead.get("budget", "Not specified"),
-            timeline=lead.get("timeline", "Flexible"),
-            audience_desc=audience_map.get(config.audience, config.audience), # mapping from frontend to the mapping in the backend
-            tone_desc=tone_map.get(config.tone, config.tone),
-            length_desc=length_instructions.get(config.length, "Standard length"),
-            focus_areas=", ".join(config.focusAreas),
-            pitch_audience=config.audience.capitalize(),
-            focus_areas_title=" & ".join([fa.replace('_', ' ').title() for fa in config.focusAreas])
-        )
-        
+
+async def generate_pitch_content(lead: Dict[str, Any], selected_services: List[str], config: PitchConfig) -> str:
+    """
+    Generates a tailored enterprise proposal using OpenAI gpt-4o-mini.
+    Uses deep lead metadata and follows a strict professional structure.
+    """
+    
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return _generate_fallback_pitch(lead, selected_services, config)
+
+    try:
+        model = hedged(llm_clients.chat("gpt-4o-mini", 0.3), "pitch")
+        prompt_text = build_pitch_prompt(lead, selected_services, config)
 
         response = await model.ainvoke(prompt_text)
         return response.content.strip()
@@ -140,21 +151,193 @@ async def generate_pitch_content(lead: Dict[str, Any], selected_services: List[s
         return _generate_fallback_pitch(lead, selected_services, config)
 
 
+async def astream_pitch_content(lead: Dict[str, Any], selected_services: List[str], config: PitchConfig):
+    """
+    Streaming variant of generate_pitch_content: yields text chunks as the
+    model produces them. Falls back to the static pitch if the model fails
+    before the first token.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        yield _generate_fallback_pitch(lead, selected_services, config)
+        return
+
+    started = False
+    try:
+        model = llm_clients.chat("gpt-4o-mini", 0.3)
+        prompt_text = build_pitch_prompt(lead, selected_services, config)
+
+        async for chunk in model.astream(prompt_text):
+            if chunk.content:
+                started = True
+                yield chunk.content
+
+    except Exception as e:
+        print(f"Error in streaming pitch generation: {e}")
+        if started:
+            raise
+        yield _generate_fallback_pitch(lead, selected_services, config)
+
+
+# ====================== SECTION-LEVEL REGENERATION ======================
+# Most feedback touches one or two sections ("make the ROI part more
+# concrete"). The pitch is split on its `#` headings, a cheap structured
+# call picks the sections the feedback affects, only those are rewritten
+# (concurrently) and spliced back; everything else is kept byte for byte.
+# Feedback that touches most of the document still goes through the
+# full rewrite.
+
+_HEADING = re.compile(r"^[ \t]*#{1,6}[ \t]+\S.*$", re.MULTILINE)
+
+
+def split_pitch_sections(content: str) -> List[Dict[str, str]]:
+    """[{"heading": str | None, "raw": exact text of the section}], in order."""
+    starts = [m.start() for m in _HEADING.finditer(content)]
+    if not starts or starts[0] > 0:
+        starts = [0] + starts
+    sections = []
+    for i, start in enumerate(starts):
+        raw = content[start:starts[i + 1] if i + 1 < len(starts) else len(content)]
+        first_line = raw.split("\n", 1)[0]
+        sections.append({"heading": first_line.strip() if _HEADING.match(first_line) else None, "raw": raw})
+    return sections
+
+
+class SectionSelection(TypedDict):
+    sections: Annotated[List[int], "Numbers of the sections the feedback requires changing."]
+    rewrite_all: Annotated[bool, "True if the feedback asks to change the whole proposal (overall tone, length, structure)."]
+
+llm_clients.declare(SectionSelection, "gpt-4o-mini", 0)
+
+SECTION_SELECTION_PROMPT = PromptTemplate(
+    template="""
+        An enterprise proposal has these sections:
+        {headings}
+
+        USER FEEDBACK:
+        ---
+        {user_feedback}
+        ---
+
+        Which sections must be rewritten to apply this feedback? Only include sections whose content
+        actually has to change. Set rewrite_all if the feedback concerns the whole document.
+        """,
+    input_variables=["headings", "user_feedback"]
+)
+
+SECTION_REWRITE_PROMPT = PromptTemplate(
+    template="""
+        You are an expert sales strategist refining ONE section of an existing enterprise proposal.
+
+        FULL PROPOSAL (for context only):
+        ---
+        {original_content}
+        ---
+
+        SECTION TO REWRITE: {heading}
+        ---
+        {section_body}
+        ---
+
+        USER FEEDBACK / MODIFICATIONS REQUESTED:
+        ---
+        {user_feedback}
+        ---
+
+        INSTRUCTIONS:
+        1. Rewrite ONLY this section, strictly incorporating the feedback that applies to it.
+        2. Maintain the original professional tone ({tone}) and target audience ({audience}).
+        3. Keep it consistent with the rest of the proposal and roughly the same length unless the feedback says otherwise.
+        4. Do NOT use emojis or marketing fluff.
+        5. Return only the section body, WITHOUT the heading line.
+
+        Rewritten Section:
+        """,
+    input_variables=["original_content", "heading", "section_body", "user_feedback", "tone", "audience"]
+)
+
+
+async def _select_sections(sections: List[Dict[str, str]], user_feedback: str):
+    """Returns the indexes of sections to rewrite, or None for a full rewrite."""
+    numbered = [(i, s["heading"]) for i, s in enumerate(sections) if s["heading"]]
+    selector = llm_clients.structured(SectionSelection, "gpt-4o-mini", 0)
+    selection = await selector.ainvoke(SECTION_SELECTION_PROMPT.format(
+        headings="\n".join(f"{n}. {heading}" for n, (_, heading) in enumerate(numbered, 1)),
+        user_feedback=user_feedback
+    ))
+
+    chosen = sorted({numbered[n - 1][0] for n in selection.get("sections", []) if 1 <= n <= len(numbered)})
+    if selection.get("rewrite_all") or not chosen or len(chosen) > len(numbered) / 2:
+        return None
+    return chosen
+
+
+async def _rewrite_section(original_content: str, section: Dict[str, str], user_feedback: str, config: PitchConfig) -> str:
+    heading_line, _, body = section["raw"].partition("\n")
+    model = llm_clients.chat("gpt-4o-mini", 0.4)
+    response = await model.ainvoke(SECTION_REWRITE_PROMPT.format(
+        original_content=original_content,
+        heading=section["heading"],
+        section_body=body.strip(),
+        user_feedback=user_feedback,
+        tone=config.tone,
+        audience=config.audience
+    ))
+
+    new_body = response.content.strip()
+    # models sometimes repeat the heading anyway
+    if new_body.split("\n", 1)[0].strip() == section["heading"]:
+        new_body = new_body.split("\n", 1)[1].strip() if "\n" in new_body else ""
+
+    # keep the blank-line layout that followed the original section
+    trailing = section["raw"][len(section["raw"].rstrip()):]
+    return f"{heading_line}\n{new_body}{trailing}"
+
+
 async def regenerate_pitch_content(original_content: str, user_feedback: str, config: PitchConfig) -> str:
     """
     Refines an existing pitch based on specific user feedback.
-    Maintains the professional structure while incorporating modifications.
+    Only the sections the feedback affects are regenerated; see above.
     """
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return f"{original_content}\n\n[REGENERATION FAILED: No API Key]\n{user_feedback}"
 
+    start = time.perf_counter()
+    with get_usage_metadata_callback() as usage:
+        mode = "full"
+        content = None
+        sections = split_pitch_sections(original_content)
+        if sum(1 for section in sections if section["heading"]) > 1:
+            try:
+                chosen = await _select_sections(sections, user_feedback)
+                if chosen is not None:
+                    rewritten = await asyncio.gather(*[
+                        _rewrite_section(original_content, sections[i], user_feedback, config) for i in chosen
+                    ])
+                    for i, raw in zip(chosen, rewritten):
+                        sections[i] = {**sections[i], "raw": raw}
+                    content = "".join(section["raw"] for section in sections).strip()
+                    mode = f"sections:{len(chosen)}"
+            except Exception as e:
+                print(f"Section regeneration failed, rewriting the whole pitch: {e}")
+
+        if content is None:
+            content = await _regenerate_full(original_content, user_feedback, config)
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    output_tokens = sum(u.get("output_tokens", 0) for u in usage.usage_metadata.values())
+    incr(f"pitch.regenerate.{mode.split(':')[0]}")
+    observe("pitch.regenerate_ms", elapsed_ms)
+    observe("pitch.regenerate_output_tokens", output_tokens)
+    print(f"[PITCH REGENERATION] mode={mode} {elapsed_ms:.0f} ms, output tokens {output_tokens}")
+    return content
+
+
+async def _regenerate_full(original_content: str, user_feedback: str, config: PitchConfig) -> str:
+    """Rewrites the whole proposal (original behaviour)."""
     try:
-        model = ChatOpenAI(
-            api_key=api_key,
-            model="gpt-4o-mini",
-            temperature=0.4
-        )
+        model = llm_clients.chat("gpt-4o-mini", 0.4)
 
         prompt_template = PromptTemplate(
             template="""
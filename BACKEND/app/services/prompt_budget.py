@@ -0,0 +1,126 @@
+import re
+import numpy as np
+
+from app.core.config import PROMPT_FIELD_TOKEN_BUDGET, PROMPT_FIELD_BUDGETS, PROMPT_SERVICE_TOKEN_BUDGET
+from app.core.metrics import observe
+from app.core.tokens import truncate_to_tokens
+from app.services.service_profile_cache import service_profiles
+
+# ---------------------------------------------------------------------
+# TOKEN-BUDGETED SERVICE CONTEXT
+# ---------------------------------------------------------------------
+# The inference prompt used to include every KB chunk of a service joined
+# together, so services with long identity / figures text produced huge
+# prompts. Each field is now assembled from its most relevant chunks until
+# its token budget is used, and the whole service block is capped too.
+#
+# Relevance = cosine between the chunk's KB embedding and the lead's
+# embedding for the same field (figures use the mean lead vector). When
+# embeddings are missing, word overlap with the lead summary is used.
+
+# service profile field ---> lead summary field it is compared against
+RELEVANCE_FIELD = {
+    "technologies": "technologies",
+    "capabilities": "capabilities",
+    "intent": "intent",
+    "identity": "identity",
+    "industry": "industry",
+    "problems": "problems",
+    "figures_context": None,  # no counterpart; compared with the whole lead
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall((text or "").lower()))
+
+
+def field_budget(field: str) -> int:
+    return PROMPT_FIELD_BUDGETS.get(field, PROMPT_FIELD_TOKEN_BUDGET)
+
+
+def _lead_vector(field: str, lead_embeddings: dict):
+    target = RELEVANCE_FIELD.get(field)
+    if target and target in lead_embeddings:
+        vector = np.asarray(lead_embeddings[target], dtype=np.float32)
+    elif lead_embeddings:
+        vector = np.mean([np.asarray(v, dtype=np.float32) for v in lead_embeddings.values()], axis=0)
+    else:
+        return None
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+def _score_chunks(field: str, chunks: list, lead_embeddings: dict, lead_words: set) -> list:
+    lead_vector = _lead_vector(field, lead_embeddings)
+    scored = []
+    for position, (text, vector, tokens) in enumerate(chunks):
+        if lead_vector is not None and vector is not None and vector.shape == lead_vector.shape:
+            relevance = float(vector @ lead_vector)
+        else:
+            words = _words(text)
+            relevance = len(words & lead_words) / max(1, len(words))
+        scored.append({"text": text, "position": position, "relevance": relevance, "tokens": tokens})
+    return scored
+
+
+def _fit_field(scored: list, budget: int) -> list:
+    # greedily take the most relevant chunks that still fit
+    selected, used = [], 0
+    for chunk in sorted(scored, key=lambda c: -c["relevance"]):
+        if used + chunk["tokens"] <= budget:
+            selected.append(chunk)
+            used += chunk["tokens"]
+    if not selected and scored:
+        # even the best chunk is over budget -> keep a truncated copy of it
+        best = max(scored, key=lambda c: c["relevance"])
+        selected = [{**best, "text": truncate_to_tokens(best["text"], budget), "tokens": budget}]
+    return selected
+
+
+def build_service_context(service: str, lead_embeddings: dict, summary: dict) -> dict:
+    """
+    Returns the service fields for the inference prompt (same keys as the
+    profile), each trimmed by relevance to fit its budget.
+    """
+    chunks = service_profiles.get_chunks(service)
+    lead_words = _words(" ".join(str(v) for v in (summary or {}).values()))
+
+    selected = {}
+    raw_tokens = 0
+    for field in RELEVANCE_FIELD:
+        scored = _score_chunks(field, chunks.get(field, []), lead_embeddings or {}, lead_words)
+        raw_tokens += sum(c["tokens"] for c in scored)
+        selected[field] = _fit_field(scored, field_budget(field))
+
+    # service-wide cap: drop the least relevant chunks, keeping one per field
+    total = sum(c["tokens"] for picked in selected.values() for c in picked)
+    while total > PROMPT_SERVICE_TOKEN_BUDGET:
+        droppable = [(c["relevance"], field, c) for field, picked in selected.items() if len(picked) > 1 for c in picked]
+        if not droppable:
+            break
+        _, field, chunk = min(droppable, key=lambda item: item[0])
+        selected[field].remove(chunk)
+        total -= chunk["tokens"]
+
+    if total > PROMPT_SERVICE_TOKEN_BUDGET:
+        # one chunk per field left and still too long -> shrink each field
+        # in proportion to its size
+        scale = PROMPT_SERVICE_TOKEN_BUDGET / total
+        for field, picked in selected.items():
+            for chunk in picked:
+                limit = int(chunk["tokens"] * scale)
+                chunk["text"] = truncate_to_tokens(chunk["text"], limit)
+                chunk["tokens"] = limit
+        total = sum(c["tokens"] for picked in selected.values() for c in picked)
+
+    context = {"service": service}
+    for field, picked in selected.items():
+        # keep KB order so the text reads like the source
+        context[field] = "\n".join(c["text"] for c in sorted(picked, key=lambda c: c["position"]))
+        observe(f"prompt.field_tokens.{field}", sum(c["tokens"] for c in picked))
+
+    observe("prompt.service_context_raw_tokens", raw_tokens)
+    observe("prompt.service_context_tokens", total)
+    return context
@@ -0,0 +1,83 @@
+import numpy as np
+
+from app.core.config import SCORE_FUSION_STRATEGY, SCORE_FIELD_WEIGHTS, SCORE_RRF_K
+
+# ---------------------------------------------------------------------
+# SCORE FUSION
+# ---------------------------------------------------------------------
+# Turns a dense service x field similarity matrix into one score per
+# service. NaN marks "no similarity known" (e.g. the service missed a
+# field's top-k on the Chroma backend). Every strategy returns scores in
+# [0, 1] so they can be shown as a percentage like the old average.
+#
+#   weighted_sum : sum_f w_f * sim[s, f], missing fields count as 0
+#   rrf          : reciprocal-rank fusion, sum_f w_f / (k + rank_f(s))
+#   max          : best weighted field similarity per service
+#   average      : legacy behaviour, mean over the fields that were hit
+
+
+def _weights(fields: list, weights: dict = None) -> np.ndarray:
+    weights = SCORE_FIELD_WEIGHTS if weights is None else weights
+    w = np.array([float(weights.get(f, 1.0)) for f in fields], dtype=np.float32)
+    total = w.sum()
+    return w / total if total > 0 else np.full(len(fields), 1.0 / max(len(fields), 1), dtype=np.float32)
+
+
+def weighted_sum(matrix: np.ndarray, w: np.ndarray, **_) -> np.ndarray:
+    return np.nan_to_num(matrix, nan=0.0) @ w
+
+
+def reciprocal_rank_fusion(matrix: np.ndarray, w: np.ndarray, k: int = SCORE_RRF_K, **_) -> np.ndarray:
+    filled = np.where(np.isnan(matrix), -np.inf, matrix)
+    # rank 1 = most similar service for that field
+    order = np.argsort(-filled, axis=0, kind="stable")
+    ranks = np.empty_like(order)
+    ranks[order, np.arange(matrix.shape[1])] = np.arange(1, matrix.shape[0] + 1)[:, None]
+
+    contributions = np.where(np.isnan(matrix), 0.0, 1.0 / (k + ranks))
+    # normalise so a service ranked first on every field scores 1.0
+    return (contributions @ w) * (k + 1)
+
+
+def max_pool(matrix: np.ndarray, w: np.ndarray, **_) -> np.ndarray:
+    # weights are rescaled so the heaviest field keeps its raw similarity
+    scaled = matrix * (w / w.max())
+    return np.nan_to_num(np.max(np.where(np.isnan(scaled), -np.inf, scaled), axis=1), neginf=0.0)
+
+
+def average_hits(matrix: np.ndarray, w: np.ndarray, **_) -> np.ndarray:
+    hit = ~np.isnan(matrix)
+    counts = hit.sum(axis=1)
+    sums = np.where(hit, matrix, 0.0).sum(axis=1)
+    return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+
+STRATEGIES = {
+    "weighted_sum": weighted_sum,
+    "rrf": reciprocal_rank_fusion,
+    "max": max_pool,
+    "average": average_hits,
+}
+
+
+def fuse_scores(services: list, fields: list, matrix, strategy: str = None, weights: dict = None) -> dict:
+    """
+    Returns {service: score in [0, 1]} sorted best first.
+    """
+    strategy = strategy or SCORE_FUSION_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown score fusion strategy: {strategy}")
+    if not services or not fields:
+        return {}
+
+    matrix = np.asarray(matrix, dtype=np.float32).reshape(len(services), len(fields))
+    scores = STRATEGIES[strategy](matrix, _weights(fields, weights))
+
+    order = np.argsort(-scores, kind="stable")
+    return {services[i]: float(scores[i]) for i in order}
+
+
+def rank_services(services: list, fields: list, matrix, strategy: str = None, weights: dict = None) -> dict:
+    """{service: int percent}, best first (the scores shown on the alignment page)."""
+    fused = fuse_scores(services, fields, matrix, strategy, weights)
+    return {service: round(100 * round(score, 4)) for service, score in fused.items()}
@@ -1,9 +1,9 @@
 import os
 from typing import Dict, Any, List
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from pydantic import BaseModel, Field
+from app.core.llm_clients import llm_clients
 
 
 load_dotenv()
@@ -12,6 +12,8 @@ class ServiceRequirementMap(BaseModel):
     service_match_score: int = Field(description = "Score (0-100) for how well the requirement is matching with company ")
     reasoning : int = Field(description = "Give the output that teh output regarding matching")
 
+llm_clients.declare(ServiceRequirementMap, "gpt-4o-mini", 0)
+
 async def validate_lead_profile(website_data: Dict[str, Any], lead_context: Dict[str, Any]) -> ServiceRequirementMap:
 
     """
@@ -22,13 +24,7 @@ async def validate_lead_profile(website_data: Dict[str, Any], lead_context: Dict
     if not api_key:
         raise ValueError("OPENAI_API_KEY not found")
 
-    model = ChatOpenAI(
-        api_key=api_key,
-        model="gpt-4o-mini",
-        temperature=0
-    )
-    
-    structured_llm = model.with_structured_output(ServiceRequirementMap)
+    structured_llm = llm_clients.structured(ServiceRequirementMap, "gpt-4o-mini", 0)
 
     
     prompt = PromptTemplate(
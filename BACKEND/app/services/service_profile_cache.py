@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+import numpy as np
+
+from app.core.executor import run_blocking
+from app.core.metrics import incr, observe
+from app.core.tokens import count_tokens
+from app.core.vector_store import collections, kb_fingerprint
+
+# ---------------------------------------------------------------------
+# MATERIALIZED SERVICE PROFILES
+# ---------------------------------------------------------------------
+# fetch_service_profile used to run one `collection.get(where=...)` per
+# collection per service (8 x top-5 sqlite lookups per alignment). The KB
+# barely changes, so the whole profile table is built once with a single
+# `get` per collection and served from memory. Each rebuild bumps
+# `version`; a rebuild happens when the KB fingerprint changes or when
+# `invalidate()` is called after re-ingestion.
+#
+# Async callers await arefresh_if_stale() first, so a (re)build runs in
+# the blocking pool; get() / get_chunks() only build inline for sync
+# callers that hit an empty table.
+#
+# The individual chunks are kept as well (with their normalised Chroma
+# embeddings and token counts) so prompt assembly can pick the most
+# relevant ones without re-tokenizing the KB on every alignment.
+
+# collection key ---> profile key
+PROFILE_FIELDS = {
+    "db_technologies": "technologies",
+    "db_capabilities": "capabilities",
+    "db_intent": "intent",
+    "db_identity": "identity",
+    "db_industries": "industry",
+    "db_problems": "problems",
+    "db_figures": "figures_context",
+    "db_service_name": "display_name"
+}
+
+
+def _normalize(vector):
+    if vector is None:
+        return None
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+def empty_profile() -> dict:
+    return {logical_key: "" for logical_key in PROFILE_FIELDS.values()}
+
+
+class ServiceProfileCache:
+    def __init__(self, collection_map: dict = None):
+        self._collections = collection_map or collections
+        self._profiles = None
+        self._chunks = {}
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.version = 0
+        self.built_at = None
+
+    @property
+    def ready(self) -> bool:
+        return self._profiles is not None
+
+    def build(self):
+        start = time.perf_counter()
+        fingerprint = kb_fingerprint()
+        chunks = defaultdict(lambda: defaultdict(list))
+
+        for db_key, logical_key in PROFILE_FIELDS.items():
+            result = self._collections[db_key].get(include=["documents", "metadatas", "embeddings"])
+            embeddings = result.get("embeddings")
+            if embeddings is None:
+                embeddings = [None] * len(result["documents"] or [])
+            for doc, meta, vector in zip(result["documents"] or [], result["metadatas"] or [], embeddings):
+                service = (meta or {}).get("service")
+                if service and doc:
+                    chunks[service][logical_key].append((doc, _normalize(vector), count_tokens(doc)))
+
+        profiles = {}
+        for service, fields in chunks.items():
+            profile = empty_profile()
+            for logical_key, docs in fields.items():
+                # Join all matching document chunks into one string for better context
+                profile[logical_key] = "\n".join(doc for doc, _, _ in docs)
+            profiles[service] = profile
+
+        with self._lock:
+            self._profiles = profiles
+            self._chunks = {service: dict(fields) for service, fields in chunks.items()}
+            self._fingerprint = fingerprint
+            self.version += 1
+            self.built_at = datetime.now(timezone.utc)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        observe("profile_cache.build_ms", elapsed_ms)
+        incr("profile_cache.builds")
+        print(f"[PROFILE CACHE] v{self.version}: {len(profiles)} services in {elapsed_ms:.1f} ms")
+
+    def invalidate(self):
+        """Drops the table; the next lookup or refresh rebuilds it."""
+        with self._lock:
+            self._profiles = None
+            self._chunks = {}
+            self._fingerprint = None
+
+    def _fresh(self) -> bool:
+        return self._profiles is not None and self._fingerprint == kb_fingerprint()
+
+    def refresh_if_stale(self) -> bool:
+        if self._fresh():
+            return False
+
+        with self._reload_lock:
+            # another thread may have rebuilt while we waited
+            if self._fresh():
+                return False
+            self.build()
+            return True
+
+    async def arefresh_if_stale(self) -> bool:
+        return await run_blocking(self.refresh_if_stale)
+
+    def _ensure_built(self):
+        if self._profiles is None:
+            self.refresh_if_stale()
+
+    def get(self, service_name: str) -> dict:
+        self._ensure_built()
+        profiles = self._profiles
+
+        profile = profiles.get(service_name)
+        if profile is None:
+            incr("profile_cache.misses")
+            return empty_profile()
+
+        incr("profile_cache.hits")
+        return dict(profile)
+
+    def get_chunks(self, service_name: str) -> dict:
+        """{profile key: [(chunk text, unit embedding or None, token count), ...]} for one service."""
+        self._ensure_built()
+        return self._chunks.get(service_name, {})
+
+    def status(self) -> dict:
+        return {
+            "version": self.version,
+            "services": len(self._profiles or {}),
+            "fingerprint": self._fingerprint,
+            "built_at": self.built_at.isoformat() if self.built_at else None
+        }
+
+
+service_profiles = ServiceProfileCache()
@@ -0,0 +1,140 @@
+import threading
+import time
+import numpy as np
+
+from app.core.metrics import incr, observe
+from app.core.vector_store import collections, kb_fingerprint
+
+# ---------------------------------------------------------------------
+# IN-PROCESS SERVICE VECTOR INDEX
+# ---------------------------------------------------------------------
+# The service KB is a handful of services spread over the service_*
+# collections, so scanning it exhaustively is cheaper than a round trip
+# through Chroma's sqlite/HNSW stack. Each collection is loaded once into a
+# contiguous float32 matrix; a lead field is scored against every row with
+# a single matrix-vector product. Distances follow the collection's space
+# exactly as Chroma reports them, so `1 - distance` stays comparable with
+# the Chroma backend.
+
+
+class _FieldMatrix:
+    def __init__(self, embeddings, metadatas, space: str):
+        matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(metadatas), -1)
+
+        self.space = space
+        self.metadatas = list(metadatas)
+        self.services = np.array([(m or {}).get("service") for m in self.metadatas], dtype=object)
+        self.sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+
+        if space == "cosine":
+            norms = np.sqrt(self.sq_norms)
+            norms[norms == 0] = 1.0
+            matrix = np.ascontiguousarray(matrix / norms[:, None])
+        self.matrix = matrix
+
+    def distances(self, query) -> np.ndarray:
+        q = np.asarray(query, dtype=np.float32)
+
+        if self.space == "cosine":
+            q_norm = np.linalg.norm(q)
+            if q_norm:
+                q = q / q_norm
+            return 1.0 - self.matrix @ q
+        if self.space == "ip":
+            return 1.0 - self.matrix @ q
+        # Chroma's l2 space reports squared euclidean distance
+        return self.sq_norms + float(q @ q) - 2.0 * (self.matrix @ q)
+
+
+class _IndexSnapshot:
+    def __init__(self, fields: dict, fingerprint: str):
+        self.fields = fields
+        self.fingerprint = fingerprint
+        self.services = sorted({
+            s for f in fields.values() for s in f.services.tolist() if s
+        })
+
+
+def _collection_space(collection) -> str:
+    metadata = collection.metadata or {}
+    if metadata.get("hnsw:space"):
+        return metadata["hnsw:space"]
+    try:
+        return collection.configuration_json["hnsw"]["space"]
+    except Exception:
+        return "cosine"
+
+
+class ServiceVectorIndex:
+    def __init__(self, collection_map: dict = None):
+        self._collections = collection_map or collections
+        self._snapshot = None
+        self._reload_lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def services(self) -> list:
+        return self._snapshot.services if self._snapshot else []
+
+    def load(self):
+        """
+        Builds a complete new snapshot and swaps it in with one assignment,
+        so concurrent readers see either the old or the new index, never a
+        half-loaded one.
+        """
+        start = time.perf_counter()
+        fingerprint = kb_fingerprint()
+        fields = {}
+
+        for key, collection in self._collections.items():
+            result = collection.get(include=["embeddings", "metadatas"])
+            embeddings = result.get("embeddings")
+            if embeddings is None or len(embeddings) == 0:
+                continue
+            fields[key] = _FieldMatrix(embeddings, result["metadatas"], _collection_space(collection))
+
+        self._snapshot = _IndexSnapshot(fields, fingerprint)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        observe("vector_index.load_ms", elapsed_ms)
+        incr("vector_index.loads")
+        rows = sum(len(f.metadatas) for f in fields.values())
+        print(f"[VECTOR INDEX] loaded {rows} rows / {len(self.services)} services in {elapsed_ms:.1f} ms")
+        return self._snapshot
+
+    def refresh_if_stale(self) -> bool:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.fingerprint == kb_fingerprint():
+            return False
+
+        with self._reload_lock:
+            # another thread may have reloaded while we waited
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.fingerprint == kb_fingerprint():
+                return False
+            self.load()
+            return True
+
+    def score_all(self, collection_key: str, embedding) -> dict:
+        """
+        Exact similarity of the query against EVERY service in the collection:
+        {service: best cosine similarity over that service's rows}.
+        """
+        field = self._snapshot.fields.get(collection_key) if self._snapshot else None
+        if field is None:
+            return {}
+
+        similarities = 1.0 - field.distances(embedding)
+        scores = {}
+        for service, similarity in zip(field.services.tolist(), similarities.tolist()):
+            if service and similarity > scores.get(service, float("-inf")):
+                scores[service] = similarity
+        return scores
+
+
+service_index = ServiceVectorIndex()
@@ -1,10 +1,15 @@
 import os
+import asyncio
 from typing import List, Dict, Any, Annotated
 from typing_extensions import TypedDict
 from datetime import datetime
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
+from app.core.concurrency import llm_slot
+from app.core.llm_clients import llm_clients
+from app.core.llm_hedging import hedged
+from app.core.metrics import observe
+from app.core.tokens import count_tokens
 
 load_dotenv()
 
@@ -18,6 +23,8 @@ class AlignmentInference(TypedDict):
     key_features: Annotated[List[str], "A list of specific features that directly address the client's problems."]
     service_figures: Annotated[str, "A single, most compelling performance metric (e.g., '90% improvement...')."]
 
+llm_clients.declare(AlignmentInference, "gpt-4o-mini", 0.2)
+
 async def infer_service_alignment(extraction_summary: Dict[str, Any], service_data: Dict[str, Any]) -> AlignmentInference:
     """
     Uses LLM to infer detailed alignment reasoning and experience for a matched service.
@@ -28,13 +35,7 @@ async def infer_service_alignment(extraction_summary: Dict[str, Any], service_da
         raise ValueError("OPENAI_API_KEY not found")
 
     try:
-        model = ChatOpenAI(
-            api_key=api_key,
-            model="gpt-4o-mini",
-            temperature=0.2
-        )
-        
-        structured_llm = model.with_structured_output(AlignmentInference)
+        structured_llm = hedged(llm_clients.structured(AlignmentInference, "gpt-4o-mini", 0.2), "alignment")
 
         prompt_template = PromptTemplate(
             template="""
@@ -102,7 +103,9 @@ async def infer_service_alignment(extraction_summary: Dict[str, Any], service_da
             service_figures_context=service_data.get("figures_context", "N/A")
         )
 
-        response = await structured_llm.ainvoke(prompt_text)
+        observe("prompt.alignment_tokens", count_tokens(prompt_text))
+        async with llm_slot():
+            response = await structured_llm.ainvoke(prompt_text)
         return response
 
     except Exception as e:
@@ -119,3 +122,116 @@ async def infer_service_alignment(extraction_summary: Dict[str, Any], service_da
             "key_features": ["Dynamic Feature Analysis Pending"],
             "service_figures": "History stats available in the full core deck."
         }
+
+
+# ====================== BATCHED TOP-N INFERENCE ======================
+# One call for all matched services: the client requirements are sent once
+# followed by every service's knowledge block, instead of five prompts that
+# each repeat the lead context. Services the model skips (or a failed batch)
+# fall back to infer_service_alignment one by one.
+
+class ServiceAlignmentResult(TypedDict):
+    service: Annotated[str, "The INT Service Name exactly as given in the SERVICE block."]
+    reasoning: Annotated[str, "A comprehensive, multi-paragraph explanation of why the match is happening, triangulating client intent, problems, and INT capabilities."]
+    relevant_experience: Annotated[List[ExperiencePoint], "A list of detailed experience objects extracted from service data, especially figures and stats."]
+    key_features: Annotated[List[str], "A list of specific features that directly address the client's problems."]
+    service_figures: Annotated[str, "A single, most compelling performance metric (e.g., '90% improvement...')."]
+
+class BatchedAlignmentInference(TypedDict):
+    services: Annotated[List[ServiceAlignmentResult], "One analysis per INT service, in the order given."]
+
+llm_clients.declare(BatchedAlignmentInference, "gpt-4o-mini", 0.2)
+
+BATCHED_ALIGNMENT_PROMPT = PromptTemplate(
+    template="""
+        As a senior solution architect at INT, perform a comprehensive strategic analysis of the alignment between a client's requirements and EACH of the INT services listed below.
+
+        CLIENT REQUIREMENTS (Extracted from Document):
+        - Intent/Objectives: {intent}
+        - Required Capabilities: {capabilities_needed}
+        - Problem Statements: {problems}
+        - Tech Environment: {technologies}
+        - Industry: {industry}
+
+        INT SERVICE KNOWLEDGE BASE:
+        {service_blocks}
+
+        ---
+
+        For EACH service above, analyse it independently against the client requirements:
+
+        1. WHY THIS MATCH IS HAPPENING (Concise Triangulation):
+        Provide a detailed explanation of EXACTLY 4 to 5 sentences explaining the alignment.
+        You MUST explicitly triangulate:
+        - How the client's SPECIFIC INTENT aligns with the INT SERVICE'S STRATEGIC DIRECTION.
+        - How the client's PAIN POINTS are resolved by the METHODOLOGIES of this service.
+        Avoid generic sentences. Use specific details from the client requirements and INT knowledge base.
+
+        2. RELEVANT INT EXPERIENCE:
+        Extract 2-3 specific accomplishments or case studies as objects with "client" and "outcome" fields.
+        PRIORITIZE data from that service's "INT Service Figures & Stats" section.
+
+        3. KEY FEATURES INVOLVED:
+        Identify 4-5 core features of this INT service that are most critical to solving the client's specific problems.
+
+        4. SERVICE FIGURES (HIGHLIGHT):
+        Extract ONE most compelling history stat or metric strictly from that service's "INT Service Figures & Stats" section.
+
+        Return exactly one entry per service, using the INT Service Name verbatim in the "service" field.
+        Use professional, authoritative, and data-driven enterprise language.
+        """,
+    input_variables=["intent", "capabilities_needed", "technologies", "problems", "industry", "service_blocks"]
+)
+
+
+def _render_service_block(index: int, service_data: Dict[str, Any]) -> str:
+    return "\n".join([
+        f"SERVICE {index}:",
+        f"        - INT Service Name: {service_data.get('service', 'N/A')}",
+        f"        - Service Intent: {service_data.get('intent', 'N/A')}",
+        f"        - Service Capabilities: {service_data.get('capabilities', 'N/A')}",
+        f"        - Problems this Service Solves: {service_data.get('problems', 'N/A')}",
+        f"        - Service Tech Stack: {service_data.get('technologies', 'N/A')}",
+        f"        - INT Service Identity & Experience: {service_data.get('identity', 'N/A')}",
+        f"        - INT Service Figures & Stats: {service_data.get('figures_context', 'N/A')}",
+    ])
+
+
+async def infer_service_alignments_batched(extraction_summary: Dict[str, Any], services_data: List[Dict[str, Any]]) -> List[AlignmentInference]:
+    """
+    Infers alignment for all services in one structured call. Returns one
+    AlignmentInference per entry of services_data, in the same order.
+    """
+    results = {}
+    try:
+        structured_llm = hedged(llm_clients.structured(BatchedAlignmentInference, "gpt-4o-mini", 0.2), "alignment_batched")
+        prompt_text = BATCHED_ALIGNMENT_PROMPT.format(
+            intent=extraction_summary.get("intent", "N/A"),
+            capabilities_needed=extraction_summary.get("capabilities", "N/A"),
+            technologies=extraction_summary.get("technologies", "N/A"),
+            problems=extraction_summary.get("problems", "N/A"),
+            industry=extraction_summary.get("industry", "N/A"),
+            service_blocks="\n\n        ".join(
+                _render_service_block(i, data) for i, data in enumerate(services_data, 1)
+            )
+        )
+
+        observe("prompt.alignment_batched_tokens", count_tokens(prompt_text))
+        async with llm_slot():
+            response = await structured_llm.ainvoke(prompt_text)
+
+        for item in response.get("services", []):
+            name = item.get("service")
+            if name and name not in results:
+                results[name] = {key: value for key, value in item.items() if key != "service"}
+    except Exception as e:
+        print(f"Batched service alignment failed, falling back per service: {e}")
+
+    missing = [data for data in services_data if data.get("service") not in results]
+    if missing:
+        print(f"[BATCHED INFERENCE] falling back for {[data.get('service') for data in missing]}")
+        fallbacks = await asyncio.gather(*[infer_service_alignment(extraction_summary, data) for data in missing])
+        for data, inference in zip(missing, fallbacks):
+            results[data.get("service")] = inference
+
+    return [results[data.get("service")] for data in services_data]
@@ -0,0 +1,89 @@
+import hashlib
+from datetime import datetime, timezone
+import numpy as np
+from bson import Binary
+
+from app.core.database import get_db
+from app.core.metrics import incr
+from app.core.vector_store import EMBEDDING_MODEL
+from app.services.pdf_summarizer import SUMMARY_MODEL, SUMMARY_PROMPT_VERSION
+
+# ---------------------------------------------------------------------
+# CONTENT-HASH CACHE FOR LEAD SUMMARIES + FIELD EMBEDDINGS
+# ---------------------------------------------------------------------
+# Keyed by sha256(document texts) + prompt version + models, so a repeat
+# alignment on an unchanged document (or the same RFP uploaded for another
+# lead) skips both the summarization call and the embedding call. Bump
+# SUMMARY_PROMPT_VERSION whenever the summarization prompt changes.
+
+def text_sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def documents_sha256(texts: list) -> str:
+    """Content hash over all lead documents (order-sensitive)."""
+    return combine_text_hashes([text_sha256(text) for text in texts])
+
+
+def combine_text_hashes(hashes: list) -> str:
+    """documents_sha256 from the per-document hashes (no text needed)."""
+    if len(hashes) == 1:
+        return hashes[0]
+    return text_sha256("\n".join(hashes))
+
+
+def summary_cache_key(text_hash: str) -> str:
+    return f"{text_hash}:{SUMMARY_PROMPT_VERSION}:{SUMMARY_MODEL}:{EMBEDDING_MODEL}"
+
+
+def _encode_embeddings(field_embeddings: dict) -> dict:
+    # float32 bytes are ~4x smaller than a BSON array of doubles
+    return {
+        field: Binary(np.asarray(vector, dtype=np.float32).tobytes())
+        for field, vector in field_embeddings.items()
+    }
+
+
+def _decode_embeddings(stored: dict) -> dict:
+    return {
+        field: np.frombuffer(bytes(blob), dtype=np.float32)
+        for field, blob in (stored or {}).items()
+    }
+
+
+async def load_cached_summary(cache_key: str):
+    """
+    Returns (summary, field_embeddings) for a cached document, or None.
+    """
+    db = get_db()
+    doc = await db.summary_cache.find_one_and_update(
+        {"_id": cache_key},
+        {"$inc": {"hits": 1}, "$set": {"last_used_at": datetime.now(timezone.utc)}}
+    )
+    if not doc:
+        incr("summary_cache.misses")
+        return None
+
+    incr("summary_cache.hits")
+    return doc["summary"], _decode_embeddings(doc.get("field_embeddings"))
+
+
+async def store_cached_summary(cache_key: str, text_hash: str, summary: dict, field_embeddings: dict):
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    await db.summary_cache.update_one(
+        {"_id": cache_key},
+        {
+            "$set": {
+                "text_sha256": text_hash,
+                "prompt_version": SUMMARY_PROMPT_VERSION,
+                "model": SUMMARY_MODEL,
+                "embedding_model": EMBEDDING_MODEL,
+                "summary": dict(summary),
+                "field_embeddings": _encode_embeddings(field_embeddings),
+                "last_used_at": now
+            },
+            "$setOnInsert": {"created_at": now, "hits": 0}
+        },
+        upsert=True
+    )
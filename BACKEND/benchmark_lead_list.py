@@ -0,0 +1,109 @@
+"""
+GET /leads benchmark: per-lead company lookups (old) vs one $lookup
+aggregation (lead_list_pipeline).
+
+Seeds a scratch database with N leads (each with a few KB of document
+text, like real leads) and their companies, then times both ways of
+building the list. The scratch database is dropped afterwards.
+
+Usage:
+    python benchmark_lead_list.py                       # 100, 1000, 10000 leads
+    python benchmark_lead_list.py --sizes 100,1000 --repeats 20 --db leads_bench
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from dotenv import load_dotenv
+
+# .env next to this script, regardless of the working directory / OS
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.index_specs import lead_list_pipeline
+
+
+async def seed(db, count: int):
+    await db.leads.delete_many({})
+    await db.companies.delete_many({})
+
+    companies = [
+        {"name": f"Company {i}", "website": f"company{i}.example", "size": "201-500"}
+        for i in range(max(1, count // 2))
+    ]
+    company_ids = (await db.companies.insert_many(companies)).inserted_ids
+
+    now = datetime.now(timezone.utc)
+    filler = "Lorem ipsum dolor sit amet. " * 150
+    leads = [
+        {
+            "company_id": random.choice(company_ids),
+            "industry": random.choice(["Insurance", "Banking", "Retail", "Healthcare"]),
+            "business_context": {"industry": "Insurance", "pain_points_requirements_text": filler[:500]},
+            "sales_qualification": {"lead_source": "Referral"},
+            "documents": [{"original_name": "rfp.pdf", "extracted_text": filler}],
+            "score": random.uniform(0, 100),
+            "owner": "Sarah Johnson",
+            "matched_services": [{"service": f"Service {j}", "reasoning": filler[:300]} for j in range(5)],
+            "created_at": now - timedelta(seconds=i)
+        }
+        for i in range(count)
+    ]
+    for start in range(0, count, 1000):
+        await db.leads.insert_many(leads[start:start + 1000])
+
+
+async def list_n_plus_one(db):
+    # the previous list_leads body
+    leads = await db.leads.find().sort("created_at", -1).to_list(100)
+    results = []
+    for lead in leads:
+        company = await db.companies.find_one({"_id": lead["company_id"]})
+        results.append({
+            "id": str(lead["_id"]),
+            "companyName": company["name"] if company else "Unknown",
+            "servicesCount": len(lead.get("matched_services", [])),
+        })
+    return results
+
+
+async def list_aggregated(db):
+    return await db.leads.aggregate(lead_list_pipeline(100)).to_list(100)
+
+
+async def time_it(fn, db, repeats: int):
+    await fn(db)  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn(db)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+
+async def main(sizes, repeats: int, db_name: str):
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
+    db = client[db_name]
+    try:
+        print(f"{'leads':>8} | {'N+1 p50':>9} {'p95':>9} | {'$lookup p50':>11} {'p95':>9} | speedup")
+        for size in sizes:
+            await seed(db, size)
+            old_p50, old_p95 = await time_it(list_n_plus_one, db, repeats)
+            new_p50, new_p95 = await time_it(list_aggregated, db, repeats)
+            print(f"{size:>8} | {old_p50:>7.1f}ms {old_p95:>7.1f}ms | {new_p50:>9.1f}ms {new_p95:>7.1f}ms | {old_p50 / new_p50:>6.1f}x")
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GET /leads list query benchmark")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--db", default="lead_list_benchmark", help="scratch database, dropped afterwards")
+    args = parser.parse_args()
+    asyncio.run(main([int(s) for s in args.sizes.split(",")], args.repeats, args.db))
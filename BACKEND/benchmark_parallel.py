@@ -1,29 +1,67 @@
-import os
+"""
+Parallel inference benchmark.
+
+Runs infer_service_alignment `--calls` times with at most `--concurrency`
+in flight and reports wall time, throughput and latency percentiles.
+
+Works offline against a cassette:
+    LLM_CASSETTE_MODE=record python benchmark_parallel.py --calls 5     # once, with a real key
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_LATENCY=lognormal:2500,0.4 \\
+        python benchmark_parallel.py --calls 500 --concurrency 50
+"""
+import argparse
 import asyncio
 import time
+from pathlib import Path
 from dotenv import load_dotenv
+
+# .env next to this script, regardless of the working directory / OS
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
 from app.services.structured_service_result import infer_service_alignment
 
-async def benchmark():
-    load_dotenv(r'c:\Users\Navvidha_Bharech\Desktop\INT Business Central Project\BACKEND\.env')
-    
+
+async def benchmark(calls: int, concurrency: int):
     summary = {
         "intent": "Modernization", "capabilities": "Cloud", "technologies": "Java", "problems": "Legacy", "industry": "Insurance"
     }
-    
+
     service_data = {
         "service": "Test Service", "intent": "Test", "capabilities": "Test", "problems": "Test", "technologies": "Test", "identity": "Test"
     }
 
-    print("Running 5 parallel inference calls...")
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one_call():
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                return await infer_service_alignment(summary, service_data)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+    print(f"Running {calls} inference calls, {concurrency} at a time...")
     start_time = time.time()
-    tasks = [infer_service_alignment(summary, service_data) for _ in range(5)]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    results = await asyncio.gather(*[one_call() for _ in range(calls)], return_exceptions=True)
     end_time = time.time()
-    
-    print(f"Total time for 5 parallel calls: {end_time - start_time:.2f} seconds")
-    for i, res in enumerate(results):
-        print(f"Result {i+1} status: {'Success' if not isinstance(res, Exception) else 'Failed'}")
+
+    elapsed = end_time - start_time
+    failed = sum(1 for res in results if isinstance(res, Exception))
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+    print(f"Total time for {calls} calls: {elapsed:.2f} seconds ({calls / elapsed:.1f} calls/s)")
+    print(f"Latency p50 {pct(0.50):.2f}s  p95 {pct(0.95):.2f}s  max {latencies[-1]:.2f}s")
+    print(f"Succeeded: {calls - failed}  Failed: {failed}")
+    for res in results:
+        if isinstance(res, Exception):
+            print(f"First failure: {res!r}")
+            break
 
 if __name__ == "__main__":
-    asyncio.run(benchmark())
+    parser = argparse.ArgumentParser(description="Parallel infer_service_alignment benchmark")
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.calls, args.concurrency))
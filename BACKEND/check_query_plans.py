@@ -0,0 +1,56 @@
+"""
+Query-plan check for the registered hot queries (app.core.indexes).
+
+Creates the declared indexes in a scratch database on a local mongod,
+runs explain() on every hot query and exits with status 1 if any of them
+plans a COLLSCAN. The scratch database is dropped afterwards.
+
+Usage:
+    python check_query_plans.py                                    # mongodb://localhost:27017
+    python check_query_plans.py --uri mongodb://localhost:27018 --db plan_check --keep
+"""
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+from dotenv import load_dotenv
+
+# .env next to this script, regardless of the working directory / OS
+load_dotenv(Path(__file__).resolve().parent / ".env")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB", "int_business_central")
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.core.indexes import index_manager
+# registers every index and hot query; needs neither the KB nor OpenAI
+import app.core.index_specs  # noqa: F401
+
+
+async def main(uri: str, db_name: str, keep: bool) -> int:
+    client = AsyncIOMotorClient(uri)
+    db = client[db_name]
+    try:
+        await index_manager.ensure(db)
+        report = await index_manager.verify_query_plans(db)
+    finally:
+        if not keep:
+            await client.drop_database(db_name)
+        client.close()
+
+    for entry in report:
+        status = "COLLSCAN" if entry["collscan"] else "ok"
+        print(f"{status:>8}  {entry['name']:<28} {' > '.join(entry['stages'])}")
+
+    scans = [entry for entry in report if entry["collscan"]]
+    print(f"{len(report)} hot queries checked, {len(scans)} collection scan(s)")
+    return 1 if scans else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="explain() check for registered hot queries")
+    parser.add_argument("--uri", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="query_plan_check", help="scratch database, dropped afterwards")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.uri, args.db, args.keep)))
@@ -0,0 +1,125 @@
+"""
+Offline evaluator for the score-fusion strategies.
+
+Replays saved retrieval results (e.g. VECTOR_DB/retrieval_result.json) and
+reports, per strategy, how the ranking differs from the saved one and how
+long scoring takes. No OpenAI / Chroma calls are made.
+
+Usage:
+    python evaluate_score_fusion.py [result.json ...] [--weights problems=2,industry=1.5]
+
+Accepted record formats (a file may hold one record or a list of them):
+    {"recommendations": [{"service": ..., "cosine_similarity": ...,
+                          "signal_breakdown": {"pain": 0.43, "tech": 0.54, ...}}]}
+    {"similarities": {service: {field: similarity}}, "ranking": [service, ...]}
+"""
+import argparse
+import json
+import time
+import numpy as np
+
+from app.core.config import _parse_weights
+from app.services.score_fusion import STRATEGIES, fuse_scores
+
+DEFAULT_PATH = "VECTOR_DB/retrieval_result.json"
+
+# signal names used by the older retrieval dumps ---> summary field names
+SIGNAL_FIELDS = {
+    "pain": "problems",
+    "industry": "industry",
+    "capability": "capabilities",
+    "tech": "technologies",
+    "intent": "intent",
+    "identity": "identity",
+}
+
+
+def load_records(paths):
+    records = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records.extend(data if isinstance(data, list) else [data])
+    return records
+
+
+def record_to_matrix(record):
+    """Returns (services, fields, matrix, saved_ranking)."""
+    if "similarities" in record:
+        similarities = record["similarities"]
+        saved_ranking = record.get("ranking") or list(similarities.keys())
+    else:
+        recs = record.get("recommendations", [])
+        similarities = {
+            r["service"]: {SIGNAL_FIELDS.get(k, k): v for k, v in r.get("signal_breakdown", {}).items()}
+            for r in recs
+        }
+        saved_ranking = [r["service"] for r in sorted(recs, key=lambda r: -r.get("cosine_similarity", 0))]
+
+    services = list(similarities.keys())
+    fields = sorted({f for sims in similarities.values() for f in sims})
+    matrix = np.full((len(services), len(fields)), np.nan, dtype=np.float32)
+    for i, service in enumerate(services):
+        for j, field in enumerate(fields):
+            if field in similarities[service]:
+                matrix[i, j] = similarities[service][field]
+
+    return services, fields, matrix, saved_ranking
+
+
+def kendall_tau(a, b):
+    common = [x for x in a if x in b]
+    pos_b = {x: i for i, x in enumerate(b)}
+    n = len(common)
+    if n < 2:
+        return 1.0
+    concordant = discordant = 0
+    for i in range(n):
+        for j in range(i + 1, n):
+            if pos_b[common[i]] < pos_b[common[j]]:
+                concordant += 1
+            else:
+                discordant += 1
+    return (concordant - discordant) / (n * (n - 1) / 2)
+
+
+def evaluate(records, weights, top_k=5, repeats=1000):
+    matrices = [record_to_matrix(r) for r in records]
+
+    for strategy in STRATEGIES:
+        taus, overlaps, moved = [], [], 0
+        for services, fields, matrix, saved in matrices:
+            ranking = list(fuse_scores(services, fields, matrix, strategy, weights).keys())
+            taus.append(kendall_tau(ranking, saved))
+            overlaps.append(len(set(ranking[:top_k]) & set(saved[:top_k])) / max(1, min(top_k, len(saved))))
+            moved += sum(1 for i, s in enumerate(ranking) if i < len(saved) and saved[i] != s)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for services, fields, matrix, _saved in matrices:
+                fuse_scores(services, fields, matrix, strategy, weights)
+        per_query_us = (time.perf_counter() - start) / (repeats * max(1, len(matrices))) * 1e6
+
+        print(f"\n== {strategy} ==")
+        print(f"  kendall tau vs saved : {np.mean(taus):.3f}")
+        print(f"  top-{top_k} overlap       : {np.mean(overlaps):.2%}")
+        print(f"  positions changed    : {moved}")
+        print(f"  scoring time / query : {per_query_us:.1f} us")
+
+        first_services, first_fields, first_matrix, first_saved = matrices[0]
+        ranked = fuse_scores(first_services, first_fields, first_matrix, strategy, weights)
+        for i, (service, score) in enumerate(list(ranked.items())[:top_k], 1):
+            before = first_saved.index(service) + 1 if service in first_saved else "-"
+            print(f"    {i}. {service:<40} {score:.4f}  (saved #{before})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay saved retrievals through the score-fusion strategies")
+    parser.add_argument("paths", nargs="*", default=[DEFAULT_PATH])
+    parser.add_argument("--weights", default="", help="per-field weights, e.g. problems=2,industry=1.5")
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+
+    records = load_records(args.paths)
+    print(f"Loaded {len(records)} saved retrieval(s)")
+    evaluate(records, _parse_weights(args.weights) if args.weights else None, args.top_k)
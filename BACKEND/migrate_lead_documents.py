@@ -0,0 +1,63 @@
+"""
+Moves extracted document text out of leads.documents into the compressed
+lead_documents collection (app.services.lead_documents), leaving a
+reference + hash on the lead.
+
+Idempotent and resumable: only leads that still have inline
+`extracted_text` are touched, and the text is written before the lead is
+updated, so an interrupted run loses nothing.
+
+Usage:
+    python migrate_lead_documents.py [--dry-run]
+"""
+import argparse
+import asyncio
+from pathlib import Path
+from dotenv import load_dotenv
+
+# .env next to this script, regardless of the working directory / OS
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
+from bson import ObjectId
+from app.core.database import get_db
+from app.services.lead_documents import document_ref, store_document_text
+
+
+async def migrate(dry_run: bool):
+    db = get_db()
+    legacy = {"documents.extracted_text": {"$exists": True}}
+    total = await db.leads.count_documents(legacy)
+    print(f"{total} lead(s) with inline document text")
+    if dry_run or not total:
+        return
+
+    moved_leads, moved_docs, inline_bytes = 0, 0, 0
+    async for lead in db.leads.find(legacy, {"documents": 1}):
+        refs = []
+        for doc in lead["documents"]:
+            if "extracted_text" not in doc:
+                refs.append(doc)
+                continue
+            text = doc.get("extracted_text") or ""
+            doc_id = doc.get("_id") or ObjectId()
+            await store_document_text(db, lead["_id"], doc_id, text)
+
+            ref = document_ref(doc_id, doc.get("original_name"), doc.get("file_type"), text)
+            ref["uploaded_at"] = doc.get("uploaded_at", ref["uploaded_at"])
+            refs.append(ref)
+            moved_docs += 1
+            inline_bytes += len(text.encode("utf-8"))
+
+        await db.leads.update_one({"_id": lead["_id"]}, {"$set": {"documents": refs}})
+        moved_leads += 1
+        if moved_leads % 100 == 0:
+            print(f"  {moved_leads}/{total}")
+
+    print(f"Moved {moved_docs} document(s) from {moved_leads} lead(s), {inline_bytes / 1e6:.1f} MB of text off the leads")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move lead document text to lead_documents")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.dry_run))
@@ -0,0 +1,49 @@
+"""
+Backfills the stored `excerpt` of pitches saved before excerpts were
+computed at insert time (GET /intelligence/pitches no longer reads content).
+
+Idempotent: only pitches without an excerpt are touched.
+
+Usage:
+    python migrate_pitch_excerpts.py [--batch-size 500] [--dry-run]
+"""
+import argparse
+import asyncio
+from pathlib import Path
+from dotenv import load_dotenv
+
+# .env next to this script, regardless of the working directory / OS
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
+from pymongo import UpdateOne
+from app.core.database import get_db
+from app.models.pitch_schema import pitch_excerpt
+
+
+async def backfill(batch_size: int, dry_run: bool):
+    db = get_db()
+    missing = {"excerpt": {"$exists": False}}
+    total = await db.pitches.count_documents(missing)
+    print(f"{total} pitch(es) without an excerpt")
+    if dry_run or not total:
+        return
+
+    updated = 0
+    batch = []
+    async for pitch in db.pitches.find(missing, {"content": 1}):
+        batch.append(UpdateOne({"_id": pitch["_id"]}, {"$set": {"excerpt": pitch_excerpt(pitch.get("content", ""))}}))
+        if len(batch) >= batch_size:
+            updated += (await db.pitches.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+            print(f"  {updated}/{total}")
+    if batch:
+        updated += (await db.pitches.bulk_write(batch, ordered=False)).modified_count
+    print(f"Backfilled {updated} excerpt(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill stored pitch excerpts")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(backfill(args.batch_size, args.dry_run))
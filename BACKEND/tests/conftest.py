@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# tests import the app the same way the server does, from BACKEND/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# app.core.database reads these at import time; nothing here connects to Mongo
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_DB", "test")
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from app.core.indexes import _winning_stages
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def test_find_explain():
+    explain = {"queryPlanner": {
+        "winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "status_1"}},
+        "rejectedPlans": [{"stage": "COLLSCAN"}],
+    }}
+    assert _winning_stages(explain) == ["FETCH", "IXSCAN"]
+
+
+def test_sharded_and_aggregate_explain():
+    explain = {"stages": [
+        {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}},
+        {"$group": {}},
+    ]}
+    assert _winning_stages(explain) == ["COLLSCAN"]
+
+    sharded = {"queryPlanner": {"winningPlan": {"stage": "SHARD_MERGE", "shards": [
+        {"winningPlan": {"stage": "IXSCAN"}},
+        {"winningPlan": {"stage": "COLLSCAN"}},
+    ]}}}
+    assert "COLLSCAN" in _winning_stages(sharded)
+
+
+def test_no_plan():
+    assert _winning_stages({"ok": 1}) == []
+
+
+def test_index_specs_import_without_the_kb_or_llm_stack():
+    # what check_query_plans.py relies on; run in a fresh interpreter so
+    # modules imported by other tests don't count
+    code = (
+        "import sys, app.core.index_specs; "
+        "from app.core.indexes import index_manager; "
+        "heavy = [m for m in sys.modules if m.split('.')[0] in ('chromadb', 'langchain_core', 'openai')]; "
+        "assert not heavy, heavy; "
+        "assert index_manager.declared() and index_manager._hot_queries"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND, check=True)
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+# job_queue pulls in the alignment pipeline (Chroma, LangChain) and the
+# LinkedIn validator (browser_use) through its handlers
+pytest.importorskip("chromadb")
+pytest.importorskip("langchain_openai")
+pytest.importorskip("browser_use")
+
+from app.services import job_queue  # noqa: E402
+
+
+class _Result:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class _Jobs:
+    """In-memory `jobs` collection with the unique partial index on active_key."""
+
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, query):
+        await asyncio.sleep(0)  # let concurrent submits interleave like real round trips
+        return next((d for d in self.docs if all(d.get(k) == v for k, v in query.items())), None)
+
+    async def insert_one(self, doc):
+        await asyncio.sleep(0)
+        if "active_key" in doc and any(d.get("active_key") == doc["active_key"] for d in self.docs):
+            raise DuplicateKeyError("E11000 duplicate key error collection: jobs index: active_key_1")
+        doc = {**doc, "_id": len(self.docs) + 1}
+        self.docs.append(doc)
+        return _Result(doc["_id"])
+
+
+class _DB:
+    def __init__(self):
+        self.jobs = _Jobs()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = _DB()
+    monkeypatch.setattr(job_queue, "get_db", lambda: db)
+    return db
+
+
+def test_concurrent_submits_create_one_job(db):
+    async def submit_many():
+        return await asyncio.gather(*[
+            job_queue.submit_job("service_alignment", {"lead_id": "abc"}) for _ in range(5)
+        ])
+
+    jobs = asyncio.run(submit_many())
+    assert len(db.jobs.docs) == 1
+    assert {job["_id"] for job in jobs} == {db.jobs.docs[0]["_id"]}
+
+
+def test_finished_job_does_not_block_a_new_submit(db):
+    first = asyncio.run(job_queue.submit_job("service_alignment", {"lead_id": "abc"}))
+    # what _finish does to a job that reached a terminal status
+    db.jobs.docs[0]["status"] = "completed"
+    del db.jobs.docs[0]["active_key"]
+
+    second = asyncio.run(job_queue.submit_job("service_alignment", {"lead_id": "abc"}))
+    assert second["_id"] != first["_id"]
+    assert second["dedupe_key"] == second["active_key"] == "service_alignment:abc"
+
+
+def test_unknown_kind_is_rejected(db):
+    with pytest.raises(ValueError):
+        asyncio.run(job_queue.submit_job("nope", {}))
@@ -0,0 +1,144 @@
+import asyncio
+from typing import TypedDict
+
+import pytest
+from pydantic import BaseModel
+
+from app.core import llm_cache as llm_cache_module
+from app.core.llm_cache import CachedStructuredRunnable, LLMResponseCache, llm_cache_key, schema_fingerprint
+
+
+def test_key_depends_on_every_input():
+    base = llm_cache_key("gpt-4o-mini", 0, "Summary:abc", "prompt")
+    assert base == llm_cache_key("gpt-4o-mini", 0.0, "Summary:abc", "prompt")
+    assert len({
+        base,
+        llm_cache_key("gpt-4o", 0, "Summary:abc", "prompt"),
+        llm_cache_key("gpt-4o-mini", 0.3, "Summary:abc", "prompt"),
+        llm_cache_key("gpt-4o-mini", 0, "Summary:def", "prompt"),
+        llm_cache_key("gpt-4o-mini", 0, "Summary:abc", "prompt!"),
+    }) == 5
+
+
+def test_schema_fingerprint_follows_the_fields():
+    class Result(TypedDict):
+        score: int
+
+    class Renamed(TypedDict):
+        score: int
+
+    class Result2(TypedDict):
+        score: int
+        reason: str
+
+    class Model(BaseModel):
+        score: int
+
+    assert schema_fingerprint(Result).split(":")[1] == schema_fingerprint(Renamed).split(":")[1]
+    assert schema_fingerprint(Result).split(":")[1] != schema_fingerprint(Result2).split(":")[1]
+    assert schema_fingerprint(Model).startswith("Model:")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(tmp_path, monkeypatch, max_bytes=10_000, ttl_s=3600):
+    clock = _Clock()
+    monkeypatch.setattr(llm_cache_module.time, "time", clock)
+    return LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), ttl_s, max_bytes), clock
+
+
+def test_get_set_and_ttl(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch, ttl_s=60)
+    assert cache.get("k") is None
+    cache.set("k", {"score": 3})
+    assert cache.get("k") == {"score": 3}
+
+    clock.now += 61
+    assert cache.get("k") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_eviction_drops_least_recently_used_down_to_90_percent(tmp_path, monkeypatch):
+    cache, clock = _cache(tmp_path, monkeypatch, max_bytes=1000)
+    value = "x" * 198  # 200 bytes once JSON encoded
+    for key in "abcd":
+        cache.set(key, value)
+        clock.now += 1
+    cache.get("a")  # a is now the most recently used
+    clock.now += 1
+
+    cache.set("e", value)  # 1000 bytes: still at the cap
+    assert cache.get("b") == value
+    clock.now += 1
+
+    cache.set("f", value)  # 1200 > 1000 -> evict down to <= 900
+    assert cache.get("c") is None
+    assert cache.get("d") is None
+    assert {k for k in "abef" if cache.get(k) is not None} == set("abef")
+    assert cache.stats()["bytes"] <= 900
+
+
+class Verdict(BaseModel):
+    score: int
+
+
+class _Model:
+    """Stands in for the with_structured_output runnable; counts real calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        return Verdict(score=len(prompt))
+
+    async def ainvoke(self, prompt, **kwargs):
+        return self.invoke(prompt, **kwargs)
+
+
+@pytest.fixture
+def cached_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache_module, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache_module, "llm_cache", LLMResponseCache(str(tmp_path / "llm_cache.sqlite"), 3600, 10_000))
+    model = _Model()
+    return model, CachedStructuredRunnable(model, Verdict, "gpt-4o-mini", 0)
+
+
+def test_invoke_hits_the_cache_on_the_second_call(cached_model):
+    model, cached = cached_model
+    assert cached.invoke("abc") == Verdict(score=3)
+    assert cached.invoke("abc") == Verdict(score=3)
+    assert model.calls == 1
+    assert llm_cache_module.llm_cache.stats()["rows"] == 1
+
+    cached.invoke("abc", bypass=True)
+    assert model.calls == 2
+
+
+def test_ainvoke_hits_the_cache_on_the_second_call(cached_model):
+    model, cached = cached_model
+
+    async def twice():
+        return [await cached.ainvoke("abcd") for _ in range(2)]
+
+    assert asyncio.run(twice()) == [Verdict(score=4)] * 2
+    assert model.calls == 1
+    assert llm_cache_module.llm_cache.stats()["rows"] == 1
+
+
+def test_failed_cache_write_keeps_the_result(cached_model, monkeypatch):
+    model, cached = cached_model
+
+    def broken_set(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(llm_cache_module.llm_cache, "set", broken_set)
+    assert cached.invoke("abc") == Verdict(score=3)
+    assert asyncio.run(cached.ainvoke("abc")) == Verdict(score=3)
+    assert model.calls == 2
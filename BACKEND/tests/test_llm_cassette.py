@@ -0,0 +1,34 @@
+import asyncio
+
+import numpy as np
+
+from app.core import llm_cassette
+from app.core.llm_cassette import Cassette, aembed_with_cassette
+
+
+def _use(monkeypatch, path, mode, latency="recorded"):
+    monkeypatch.setattr(llm_cassette, "cassette", Cassette(str(path), mode, "strict", latency, 1.0, seed=1))
+
+
+def test_embeddings_replay_with_their_recorded_latency(tmp_path, monkeypatch):
+    path = tmp_path / "cassette.jsonl"
+
+    async def embed(texts):
+        return [np.full(3, i, dtype=np.float32) for i, _ in enumerate(texts)]
+
+    _use(monkeypatch, path, "record")
+    asyncio.run(aembed_with_cassette("emb", ["a", "b"], embed))
+    assert len(path.read_text().splitlines()) == 2
+
+    _use(monkeypatch, path, "replay")
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(llm_cassette.asyncio, "sleep", fake_sleep)
+    vectors = asyncio.run(aembed_with_cassette("emb", ["b", "a"], None))
+    assert [v.tolist() for v in vectors] == [[1.0] * 3, [0.0] * 3]
+
+    recorded = max(r["latency_ms"] for r in llm_cassette.cassette._records.values())
+    assert slept == [recorded / 1000]
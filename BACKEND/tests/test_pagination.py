@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_match, keyset_sort, page
+
+ROW = {"_id": ObjectId("65a1f0c2e4b0a1b2c3d4e5f6"), "created_at": datetime(2024, 1, 12, 9, 30, tzinfo=timezone.utc)}
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(ROW)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (ROW["created_at"], ROW["_id"])
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", encode_cursor(ROW)[:-4]])
+def test_foreign_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_keyset_match_starts_after_the_cursor():
+    assert keyset_match(None) == {}
+    cursor = encode_cursor(ROW)
+    assert keyset_match(cursor) == {"$or": [
+        {"created_at": {"$lt": ROW["created_at"]}},
+        {"created_at": ROW["created_at"], "_id": {"$lt": ROW["_id"]}},
+    ]}
+    ascending = keyset_match(cursor, descending=False)
+    assert ascending["$or"][0] == {"created_at": {"$gt": ROW["created_at"]}}
+    assert keyset_sort(False) == [("created_at", 1), ("_id", 1)]
+
+
+class _Response:
+    def __init__(self):
+        self.headers = {}
+
+
+def test_page_sets_the_cursor_only_when_rows_remain():
+    rows = [{"_id": ObjectId(), "created_at": ROW["created_at"]} for _ in range(3)]
+
+    response = _Response()
+    assert page(rows, 2, response) == rows[:2]
+    assert decode_cursor(response.headers[NEXT_CURSOR_HEADER])[1] == rows[1]["_id"]
+
+    response = _Response()
+    assert page(rows, 3, response) == rows
+    assert NEXT_CURSOR_HEADER not in response.headers
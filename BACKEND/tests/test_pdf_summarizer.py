@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+# pdf_summarizer declares its structured LangChain client at import time
+pytest.importorskip("langchain_openai")
+
+from app.services import pdf_summarizer  # noqa: E402
+from app.services.pdf_summarizer import DOCUMENT_SEPARATOR, pack_documents  # noqa: E402
+from app.core.tokens import count_tokens, get_encoding  # noqa: E402
+
+
+@pytest.fixture
+def encoding():
+    # tiktoken downloads the BPE file on first use
+    try:
+        get_encoding()
+    except Exception as e:
+        pytest.skip(f"tiktoken encoding unavailable: {e.__class__.__name__}")
+
+SUMMARY = {"identity": "Acme", "capabilities": "", "technologies": "SAP", "intent": "", "problems": "", "industry": "Retail"}
+
+
+def test_small_documents_are_packed_into_one_chunk(encoding):
+    assert pack_documents(["first doc", "second doc", "  "], max_tokens=100) == ["first doc" + DOCUMENT_SEPARATOR + "second doc"]
+
+
+def test_packs_respect_the_budget_and_keep_order(encoding):
+    docs = ["alpha " * 30, "beta " * 30, "gamma " * 30]
+    chunks = pack_documents(docs, max_tokens=70)
+    assert all(count_tokens(chunk) <= 70 for chunk in chunks)
+    assert len(chunks) == 2
+    assert chunks[0].startswith("alpha") and chunks[1].startswith("gamma")
+
+
+def test_long_document_is_split_on_its_own(encoding):
+    long_doc = "word " * 500
+    chunks = pack_documents(["short", long_doc], max_tokens=200)
+    assert chunks[0] == "short"
+    assert len(chunks) > 2
+    assert all(count_tokens(chunk) <= 200 for chunk in chunks[1:])
+
+
+def test_two_small_documents_cost_one_call(encoding, monkeypatch):
+    calls = []
+
+    async def fake_summarize(text):
+        calls.append(text)
+        return SUMMARY
+
+    monkeypatch.setattr(pdf_summarizer, "asummarize_text", fake_summarize)
+    stats = {}
+    assert asyncio.run(pdf_summarizer.asummarize_documents(["doc one", "doc two"], stats)) == SUMMARY
+    assert len(calls) == 1
+    assert stats["chunks"] == 1
+
+
+def test_reduce_skips_the_llm_when_there_is_nothing_to_merge(monkeypatch):
+    def no_llm():
+        raise AssertionError("reduce must not call the model")
+
+    monkeypatch.setattr(pdf_summarizer, "_structured_model", no_llm)
+    empty = {key: "" for key in SUMMARY}
+    assert asyncio.run(pdf_summarizer._reduce_partials([empty, None, empty])) == {}
+    assert asyncio.run(pdf_summarizer._reduce_partials([empty, SUMMARY])) == SUMMARY
@@ -0,0 +1,38 @@
+import pytest
+
+# pitch_generator builds its LangChain prompts and clients at import time
+pytest.importorskip("langchain_openai")
+
+from app.services.pitch_generator import split_pitch_sections  # noqa: E402
+
+PITCH = """Intro paragraph before any heading.
+
+# Executive Summary
+We help you grow.
+
+## Proposed Solution
+- CRM rollout
+  ### Timeline
+Q1 to Q3.
+"""
+
+
+def test_sections_split_on_markdown_headings():
+    sections = split_pitch_sections(PITCH)
+    assert [s["heading"] for s in sections] == [
+        None, "# Executive Summary", "## Proposed Solution", "### Timeline"
+    ]
+    assert sections[1]["raw"] == "# Executive Summary\nWe help you grow.\n\n"
+
+
+def test_sections_reassemble_to_the_original_text():
+    assert "".join(s["raw"] for s in split_pitch_sections(PITCH)) == PITCH
+
+
+def test_text_without_headings_is_one_section():
+    assert split_pitch_sections("Just a paragraph.") == [{"heading": None, "raw": "Just a paragraph."}]
+
+
+def test_hashtag_is_not_a_heading():
+    sections = split_pitch_sections("#growth matters\n# Real Heading\nbody")
+    assert [s["heading"] for s in sections] == [None, "# Real Heading"]
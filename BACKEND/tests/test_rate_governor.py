@@ -0,0 +1,30 @@
+import pytest
+
+from app.core.rate_governor import TokenBucket
+
+
+def test_full_bucket_does_not_wait():
+    bucket = TokenBucket(60)
+    assert bucket.wait_time(60, bucket.updated) == 0.0
+
+
+def test_wait_time_is_the_refill_time_of_the_shortfall():
+    bucket = TokenBucket(60)  # 1 per second
+    bucket.level = 0.0
+    assert bucket.wait_time(5, bucket.updated) == pytest.approx(5.0)
+
+
+def test_refill_is_capped_at_capacity():
+    bucket = TokenBucket(120)
+    bucket.level = 0.0
+    start = bucket.updated
+    bucket.wait_time(1, start + 30)
+    assert bucket.level == pytest.approx(60.0)
+    bucket.wait_time(1, start + 3600)
+    assert bucket.level == pytest.approx(120.0)
+
+
+def test_request_larger_than_the_bucket_only_waits_for_a_full_bucket():
+    bucket = TokenBucket(60)
+    bucket.level = 30.0
+    assert bucket.wait_time(1000, bucket.updated) == pytest.approx(30.0)
@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.services.score_fusion import STRATEGIES, fuse_scores, rank_services
+
+SERVICES = ["crm", "erp", "bi"]
+FIELDS = ["technologies", "problems"]
+MATRIX = [
+    [0.9, 0.5],
+    [0.4, np.nan],
+    [0.6, 0.7],
+]
+EQUAL = {"technologies": 1, "problems": 1}
+
+
+def test_weighted_sum_counts_missing_fields_as_zero():
+    scores = fuse_scores(SERVICES, FIELDS, MATRIX, "weighted_sum", EQUAL)
+    assert list(scores) == ["crm", "bi", "erp"]
+    assert scores["crm"] == pytest.approx(0.7)
+    assert scores["erp"] == pytest.approx(0.2)
+
+
+def test_average_only_uses_fields_that_were_hit():
+    scores = fuse_scores(SERVICES, FIELDS, MATRIX, "average", EQUAL)
+    assert scores["erp"] == pytest.approx(0.4)
+    assert scores["bi"] == pytest.approx(0.65)
+
+
+def test_max_keeps_the_best_field():
+    scores = fuse_scores(SERVICES, FIELDS, MATRIX, "max", EQUAL)
+    assert scores == pytest.approx({"crm": 0.9, "bi": 0.7, "erp": 0.4})
+
+
+def test_rrf_gives_one_to_a_service_ranked_first_everywhere():
+    matrix = [[0.9, 0.9], [0.1, 0.2]]
+    scores = fuse_scores(["a", "b"], FIELDS, matrix, "rrf", EQUAL)
+    assert scores["a"] == pytest.approx(1.0)
+    assert scores["b"] < scores["a"]
+
+
+def test_weights_change_the_ranking():
+    only_problems = fuse_scores(SERVICES, FIELDS, MATRIX, "weighted_sum", {"technologies": 0, "problems": 1})
+    assert next(iter(only_problems)) == "bi"
+
+
+@pytest.mark.parametrize("strategy", sorted(STRATEGIES))
+def test_scores_stay_in_unit_range(strategy):
+    scores = fuse_scores(SERVICES, FIELDS, MATRIX, strategy, EQUAL)
+    assert set(scores) == set(SERVICES)
+    assert all(0.0 <= s <= 1.0 and not math.isnan(s) for s in scores.values())
+
+
+def test_empty_input_and_unknown_strategy():
+    assert fuse_scores([], FIELDS, np.zeros((0, 2)), "weighted_sum") == {}
+    with pytest.raises(ValueError):
+        fuse_scores(SERVICES, FIELDS, MATRIX, "median")
+
+
+def test_rank_services_returns_int_percent_best_first():
+    ranked = rank_services(SERVICES, FIELDS, MATRIX, "weighted_sum", EQUAL)
+    assert ranked == {"crm": 70, "bi": 65, "erp": 20}
+    assert all(isinstance(v, int) for v in ranked.values())
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+# the cache reads the Chroma KB collections by default
+pytest.importorskip("chromadb")
+
+from app.services import service_profile_cache as cache_module  # noqa: E402
+from app.services.service_profile_cache import PROFILE_FIELDS, ServiceProfileCache  # noqa: E402
+
+
+class _Collection:
+    def __init__(self, service: str, text: str, gets: list):
+        self._rows = {"documents": [text], "metadatas": [{"service": service}], "embeddings": [[1.0, 0.0]]}
+        self._gets = gets
+
+    def get(self, include=None):
+        self._gets.append(1)
+        time.sleep(0.01)  # wide enough for concurrent refreshes to overlap
+        return self._rows
+
+
+@pytest.fixture
+def kb(monkeypatch):
+    state = {"fingerprint": "v1"}
+    gets = []
+    monkeypatch.setattr(cache_module, "kb_fingerprint", lambda: state["fingerprint"])
+    monkeypatch.setattr(cache_module, "count_tokens", lambda text: len(text.split()))
+    collections = {key: _Collection("crm", f"{key} text", gets) for key in PROFILE_FIELDS}
+    return ServiceProfileCache(collections), state, gets
+
+
+def test_concurrent_refreshes_build_once(kb):
+    cache, _, gets = kb
+    threads = [threading.Thread(target=cache.refresh_if_stale) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.version == 1
+    assert len(gets) == len(PROFILE_FIELDS)
+
+
+def test_refresh_follows_the_kb_fingerprint(kb):
+    cache, state, _ = kb
+    assert asyncio.run(cache.arefresh_if_stale()) is True
+    assert asyncio.run(cache.arefresh_if_stale()) is False
+
+    state["fingerprint"] = "v2"
+    assert asyncio.run(cache.arefresh_if_stale()) is True
+    assert cache.version == 2
+
+
+def test_lookups_after_refresh_do_not_rebuild(kb):
+    cache, _, gets = kb
+    asyncio.run(cache.arefresh_if_stale())
+    built = len(gets)
+
+    assert cache.get("crm")["technologies"] == "db_technologies text"
+    assert cache.get("unknown")["technologies"] == ""
+    text, vector, tokens = cache.get_chunks("crm")["technologies"][0]
+    assert (text, tokens) == ("db_technologies text", 2)
+    assert len(gets) == built
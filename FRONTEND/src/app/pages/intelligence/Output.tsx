@@ -51,6 +51,8 @@ export default function Output() {
   const [feedback, setFeedback] = useState("");
   const [isDialogOpen, setIsDialogOpen] = useState(false);
   const [pitchToRegenerate, setPitchToRegenerate] = useState<string | null>(null);
+  // Full pitch text, fetched on demand (the list only carries the excerpt)
+  const [pitchContent, setPitchContent] = useState<Record<string, string>>({});
 
   React.useEffect(() => {
     const fetchPitches = async () => {
@@ -70,15 +72,37 @@ export default function Output() {
     fetchPitches();
   }, []);
 
+  const loadPitchContent = async (pitchId: string): Promise<string | null> => {
+    if (pitchContent[pitchId] !== undefined) {
+      return pitchContent[pitchId];
+    }
+    try {
+      const response = await fetch(`${API_BASE_URL}/intelligence/pitches/${pitchId}`);
+      if (!response.ok) throw new Error("Failed to fetch pitch");
+      const data = await response.json();
+      const content = data.content || "";
+      setPitchContent((prev) => ({ ...prev, [pitchId]: content }));
+      return content;
+    } catch (error) {
+      console.error("Failed to fetch pitch content:", error);
+      toast.error("Failed to load pitch content");
+      return null;
+    }
+  };
+
   const handleViewPitch = (pitchId: string) => {
-    setExpandedPitch(expandedPitch === pitchId ? null : pitchId);
+    const expanding = expandedPitch !== pitchId;
+    setExpandedPitch(expanding ? pitchId : null);
+    if (expanding) {
+      loadPitchContent(pitchId);
+    }
   };
 
-  const handleCopyPitch = (pitchId: string) => {
-    const pitch = pitches.find((p) => p.id === pitchId);
-    if (pitch) {
+  const handleCopyPitch = async (pitchId: string) => {
+    const content = await loadPitchContent(pitchId);
+    if (content !== null) {
       const textArea = document.createElement("textarea");
-      textArea.value = pitch.content || "";
+      textArea.value = content;
       textArea.style.position = "fixed";
       textArea.style.left = "-999999px";
       textArea.style.top = "-999999px";
@@ -373,7 +397,7 @@ export default function Output() {
                           <h5 className="text-sm font-semibold text-gray-900 mb-3">Full Pitch Content</h5>
                           <div className="prose prose-sm max-w-none">
                             <div className="whitespace-pre-wrap text-sm text-gray-700 leading-relaxed font-mono">
-                              {pitch.content}
+                              {pitchContent[pitch.id] ?? "Loading..."}
                             </div>
                           </div>
                         </div>